@@ -2,84 +2,123 @@
 Generate Professional Solar AI Platform Proposal PDF
 """
 
+from reportlab.lib.colors import Color
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from io import BytesIO
+from pathlib import Path
+import functools
+import itertools
+
+# Define colors (built once and reused for every fill/stroke change)
+PRIMARY_BLUE = Color(0.2, 0.4, 0.8)
+DARK_GRAY = Color(0.2, 0.2, 0.2)
+LIGHT_GRAY = Color(0.5, 0.5, 0.5)
+GREEN = Color(0.1, 0.6, 0.3)
+ORANGE = Color(0.9, 0.5, 0.1)
+WHITE = Color(1, 1, 1)
+
+# Page geometry, computed once rather than inside each page function
+PAGE_WIDTH, PAGE_HEIGHT = letter
+CENTER_X = PAGE_WIDTH / 2
+QUARTER_X = PAGE_WIDTH / 4
+THREE_QUARTER_X = 3 * PAGE_WIDTH / 4
+
+def _draw_text_runs(c, runs):
+    """Draw (x, y, text, font, size, color) runs, grouped so font/colour change once per group"""
+    def state(run):
+        return run[3], run[4], run[5].rgb()
+
+    for (font, size, _), group in itertools.groupby(sorted(runs, key=state), key=state):
+        group = list(group)
+        text = c.beginText()
+        text.setFont(font, size)
+        text.setFillColor(group[0][5])
+        for x, y, line, *_ in group:
+            text.setTextOrigin(x, y)
+            text.textOut(line)
+        c.drawText(text)
+
+def _define_bullet_forms(c):
+    """Define one filled-circle form per bullet radius, stamped with _draw_bullet"""
+    for radius in (2, 3, 8):
+        c.beginForm(f"bullet{radius}", -radius, -radius, radius, radius)
+        c.circle(0, 0, radius, fill=True, stroke=False)
+        c.endForm()
+
+def _draw_bullet(c, x, y, radius):
+    """Stamp a bullet form at (x, y) in the current fill colour"""
+    c.saveState()
+    c.translate(x, y)
+    c.doForm(f"bullet{radius}")
+    c.restoreState()
+
+def _draw_footer(c, page_num):
+    """Demo link and page number shared by every page"""
+    c.setFillColor(PRIMARY_BLUE)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawCentredString(CENTER_X, 40, "Live Demo: https://site-surver-analysis.vercel.app/")
 
-def create_proposal_pdf(output_path="Solar_AI_Platform_Proposal.pdf"):
-    """Create a professional, concise proposal PDF"""
-
-    # Create canvas
-    c = canvas.Canvas(output_path, pagesize=letter)
-    width, height = letter
-
-    # Define colors
-    primary_blue = (0.2, 0.4, 0.8)
-    dark_gray = (0.2, 0.2, 0.2)
-    light_gray = (0.5, 0.5, 0.5)
-    green = (0.1, 0.6, 0.3)
-    orange = (0.9, 0.5, 0.1)
-
-    y = height - 60
-
-    # ============= PAGE 1: COVER =============
+    c.setFillColor(LIGHT_GRAY)
+    c.setFont("Helvetica", 9)
+    c.drawRightString(PAGE_WIDTH - 60, 20, f"Page {page_num} of 3")
 
+def _draw_cover_page(c):
+    """Page 1: cover, the problem and the solution"""
     # Header Banner
-    c.setFillColorRGB(0.2, 0.4, 0.8)
-    c.rect(0, height - 120, width, 120, fill=True, stroke=False)
+    c.setFillColor(PRIMARY_BLUE)
+    c.rect(0, PAGE_HEIGHT - 120, PAGE_WIDTH, 120, fill=True, stroke=False)
 
     # Title
-    c.setFillColorRGB(1, 1, 1)
+    c.setFillColor(WHITE)
     c.setFont("Helvetica-Bold", 32)
-    c.drawCentredString(width/2, height - 70, "Solar AI Platform")
+    c.drawCentredString(CENTER_X, PAGE_HEIGHT - 70, "Solar AI Platform")
 
     c.setFont("Helvetica", 16)
-    c.drawCentredString(width/2, height - 100, "Revolutionizing Solar Site Surveys with AI")
+    c.drawCentredString(CENTER_X, PAGE_HEIGHT - 100, "Revolutionizing Solar Site Surveys with AI")
 
-    y = height - 180
+    y = PAGE_HEIGHT - 180
 
     # Tagline
-    c.setFillColorRGB(*dark_gray)
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica-Bold", 18)
-    c.drawCentredString(width/2, y, "10 Minutes. Zero Site Visits. 100% Accuracy.")
+    c.drawCentredString(CENTER_X, y, "10 Minutes. Zero Site Visits. 100% Accuracy.")
     y -= 40
 
     # Key Stats Box
     c.setFillColorRGB(0.95, 0.95, 0.95)
-    c.roundRect(80, y - 120, width - 160, 140, 10, fill=True, stroke=False)
+    c.roundRect(80, y - 120, PAGE_WIDTH - 160, 140, 10, fill=True, stroke=False)
 
-    c.setFillColorRGB(*orange)
+    c.setFillColor(ORANGE)
     c.setFont("Helvetica-Bold", 36)
-    c.drawCentredString(width/2, y - 30, "$1,500")
-    c.setFillColorRGB(*dark_gray)
+    c.drawCentredString(CENTER_X, y - 30, "$1,500")
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica", 14)
-    c.drawCentredString(width/2, y - 50, "Cost Per Survey (Traditional)")
+    c.drawCentredString(CENTER_X, y - 50, "Cost Per Survey (Traditional)")
 
-    c.setFillColorRGB(*primary_blue)
+    c.setFillColor(PRIMARY_BLUE)
     c.setFont("Helvetica-Bold", 36)
-    c.drawCentredString(width/4, y - 90, "5-10")
-    c.setFillColorRGB(*dark_gray)
+    c.drawCentredString(QUARTER_X, y - 90, "5-10")
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica", 14)
-    c.drawCentredString(width/4, y - 110, "Days (Traditional)")
+    c.drawCentredString(QUARTER_X, y - 110, "Days (Traditional)")
 
-    c.setFillColorRGB(*green)
+    c.setFillColor(GREEN)
     c.setFont("Helvetica-Bold", 36)
-    c.drawCentredString(3*width/4, y - 90, "10 Min")
-    c.setFillColorRGB(*dark_gray)
+    c.drawCentredString(THREE_QUARTER_X, y - 90, "10 Min")
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica", 14)
-    c.drawCentredString(3*width/4, y - 110, "With AI")
+    c.drawCentredString(THREE_QUARTER_X, y - 110, "With AI")
 
     y -= 180
 
     # The Problem Section
-    c.setFillColorRGB(*primary_blue)
+    c.setFillColor(PRIMARY_BLUE)
     c.setFont("Helvetica-Bold", 20)
     c.drawString(60, y, "The Problem")
     y -= 30
 
-    c.setFillColorRGB(*dark_gray)
-    c.setFont("Helvetica", 11)
     problems = [
         "Traditional site surveys cost $1,500-$3,000 and take 5-10 days",
         "Manual shading analysis has 15-30% error margin",
@@ -88,70 +127,62 @@ def create_proposal_pdf(output_path="Solar_AI_Platform_Proposal.pdf"):
         "Failed inspections require expensive rework"
     ]
 
-    for problem in problems:
-        c.setFillColorRGB(0.8, 0.2, 0.2)
-        c.circle(70, y + 3, 3, fill=True, stroke=False)
-        c.setFillColorRGB(*dark_gray)
-        c.drawString(85, y, problem)
-        y -= 22
+    c.setFillColorRGB(0.8, 0.2, 0.2)
+    for i in range(len(problems)):
+        _draw_bullet(c, 70, y - 22 * i + 3, 3)
+    _draw_text_runs(c, [
+        (85, y - 22 * i, problem, "Helvetica", 11, DARK_GRAY)
+        for i, problem in enumerate(problems)
+    ])
+    y -= 22 * len(problems)
 
     y -= 20
 
     # The Solution Section
-    c.setFillColorRGB(*green)
+    c.setFillColor(GREEN)
     c.setFont("Helvetica-Bold", 20)
     c.drawString(60, y, "The Solution")
     y -= 30
 
-    c.setFillColorRGB(*dark_gray)
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica-Bold", 12)
     c.drawString(70, y, "AI-Powered Shading Analysis")
     c.setFont("Helvetica", 10)
-    c.setFillColorRGB(*light_gray)
+    c.setFillColor(LIGHT_GRAY)
     c.drawString(85, y - 15, "Upload 1 photo -> AI identifies obstructions -> Instant analysis")
     y -= 40
 
-    c.setFillColorRGB(*dark_gray)
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica-Bold", 12)
     c.drawString(70, y, "AI Electrical Panel Assessment")
     c.setFont("Helvetica", 10)
-    c.setFillColorRGB(*light_gray)
+    c.setFillColor(LIGHT_GRAY)
     c.drawString(85, y - 15, "Photo analysis replaces $500 electrician visit")
     y -= 40
 
-    c.setFillColorRGB(*dark_gray)
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica-Bold", 12)
     c.drawString(70, y, "AI Roof Risk Analysis")
     c.setFont("Helvetica", 10)
-    c.setFillColorRGB(*light_gray)
+    c.setFillColor(LIGHT_GRAY)
     c.drawString(85, y - 15, "Automated structural integrity assessment from photos")
     y -= 40
 
-    c.setFillColorRGB(*dark_gray)
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica-Bold", 12)
     c.drawString(70, y, "NEC 2023+ Compliance Verification")
     c.setFont("Helvetica", 10)
-    c.setFillColorRGB(*light_gray)
+    c.setFillColor(LIGHT_GRAY)
     c.drawString(85, y - 15, "Automatic code compliance checks prevent failed inspections")
 
-    # Footer
-    c.setFillColorRGB(*primary_blue)
-    c.setFont("Helvetica-Bold", 10)
-    c.drawCentredString(width/2, 40, "Live Demo: https://site-surver-analysis.vercel.app/")
-
-    # Page number
-    c.setFillColorRGB(*light_gray)
-    c.setFont("Helvetica", 9)
-    c.drawRightString(width - 60, 20, "Page 1 of 3")
-
-    c.showPage()
+    _draw_footer(c, 1)
 
-    # ============= PAGE 2: WHY WE'RE DIFFERENT =============
-
-    y = height - 80
+def _draw_differentiators_page(c):
+    """Page 2: why we're different"""
+    y = PAGE_HEIGHT - 80
 
     # Page Header
-    c.setFillColorRGB(*primary_blue)
+    c.setFillColor(PRIMARY_BLUE)
     c.setFont("Helvetica-Bold", 24)
     c.drawString(60, y, "Why We're Different")
     y -= 50
@@ -180,74 +211,61 @@ def create_proposal_pdf(output_path="Solar_AI_Platform_Proposal.pdf"):
         }
     ]
 
+    # Boxes for each advantage, then their text in two batched runs
+    c.setFillColorRGB(0.95, 0.97, 1.0)
+    c.setStrokeColor(PRIMARY_BLUE)
+    c.setLineWidth(1)
+    runs = []
     for adv in advantages:
-        # Box for each advantage
-        c.setFillColorRGB(0.95, 0.97, 1.0)
-        c.roundRect(60, y - 50, width - 120, 60, 8, fill=True, stroke=True)
-        c.setStrokeColorRGB(*primary_blue)
-        c.setLineWidth(1)
-
-        c.setFillColorRGB(*primary_blue)
-        c.setFont("Helvetica-Bold", 13)
-        c.drawString(75, y - 20, adv["title"])
-
-        c.setFillColorRGB(*dark_gray)
-        c.setFont("Helvetica", 10)
-        c.drawString(75, y - 38, adv["desc"])
+        c.roundRect(60, y - 50, PAGE_WIDTH - 120, 60, 8, fill=True, stroke=True)
+        runs.append((75, y - 20, adv["title"], "Helvetica-Bold", 13, PRIMARY_BLUE))
+        runs.append((75, y - 38, adv["desc"], "Helvetica", 10, DARK_GRAY))
 
         y -= 75
+    _draw_text_runs(c, runs)
 
     y -= 20
 
     # Current Pain Points Box
     c.setFillColorRGB(0.9, 0.2, 0.2)
-    c.roundRect(60, y - 140, width - 120, 150, 10, fill=True, stroke=False)
+    c.roundRect(60, y - 140, PAGE_WIDTH - 120, 150, 10, fill=True, stroke=False)
 
-    c.setFillColorRGB(1, 1, 1)
+    c.setFillColor(WHITE)
     c.setFont("Helvetica-Bold", 18)
-    c.drawCentredString(width/2, y - 25, "Your Current Pain Points")
+    c.drawCentredString(CENTER_X, y - 25, "Your Current Pain Points")
 
     c.setFont("Helvetica-Bold", 14)
     c.drawString(100, y - 55, "Site Surveyor:")
     c.setFont("Helvetica", 11)
-    c.drawRightString(width - 100, y - 55, "$1,500-$3,000 per site")
+    c.drawRightString(PAGE_WIDTH - 100, y - 55, "$1,500-$3,000 per site")
 
     c.setFont("Helvetica-Bold", 14)
     c.drawString(100, y - 75, "Electrician Visit:")
     c.setFont("Helvetica", 11)
-    c.drawRightString(width - 100, y - 75, "$200-$500 per site")
+    c.drawRightString(PAGE_WIDTH - 100, y - 75, "$200-$500 per site")
 
     c.setFont("Helvetica-Bold", 14)
     c.drawString(100, y - 95, "Timeline:")
     c.setFont("Helvetica", 11)
-    c.drawRightString(width - 100, y - 95, "5-10 days waiting")
+    c.drawRightString(PAGE_WIDTH - 100, y - 95, "5-10 days waiting")
 
     c.setFont("Helvetica-Bold", 14)
     c.drawString(100, y - 115, "Shading Analysis Errors:")
     c.setFont("Helvetica", 11)
-    c.drawRightString(width - 100, y - 115, "15-30% error margin")
+    c.drawRightString(PAGE_WIDTH - 100, y - 115, "15-30% error margin")
 
     c.setFont("Helvetica-Bold", 16)
     c.setFillColorRGB(1, 1, 0.6)
-    c.drawCentredString(width/2, y - 135, "AI Eliminates All These Costs & Delays")
+    c.drawCentredString(CENTER_X, y - 135, "AI Eliminates All These Costs & Delays")
 
-    # Footer
-    c.setFillColorRGB(*primary_blue)
-    c.setFont("Helvetica-Bold", 10)
-    c.drawCentredString(width/2, 40, "Live Demo: https://site-surver-analysis.vercel.app/")
+    _draw_footer(c, 2)
 
-    c.setFillColorRGB(*light_gray)
-    c.setFont("Helvetica", 9)
-    c.drawRightString(width - 60, 20, "Page 2 of 3")
-
-    c.showPage()
-
-    # ============= PAGE 3: WORKFLOW & NEXT STEPS =============
-
-    y = height - 80
+def _draw_workflow_page(c):
+    """Page 3: workflow and next steps"""
+    y = PAGE_HEIGHT - 80
 
     # Page Header
-    c.setFillColorRGB(*primary_blue)
+    c.setFillColor(PRIMARY_BLUE)
     c.setFont("Helvetica-Bold", 24)
     c.drawString(60, y, "How It Works")
     y -= 50
@@ -266,41 +284,35 @@ def create_proposal_pdf(output_path="Solar_AI_Platform_Proposal.pdf"):
         "Generate professional PDF report"
     ]
 
-    c.setFillColorRGB(*dark_gray)
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica-Bold", 14)
     c.drawString(70, y, "Traditional Workflow: 5-10 days")
     y -= 25
 
-    c.setFillColorRGB(*green)
+    c.setFillColor(GREEN)
     c.setFont("Helvetica-Bold", 14)
     c.drawString(70, y, "Solar AI Workflow: 10 minutes")
     y -= 35
 
-    step_num = 1
-    for step in steps:
-        c.setFillColorRGB(*primary_blue)
-        c.circle(75, y + 3, 8, fill=True, stroke=False)
-        c.setFillColorRGB(1, 1, 1)
-        c.setFont("Helvetica-Bold", 9)
-        c.drawCentredString(75, y, str(step_num))
-
-        c.setFillColorRGB(*dark_gray)
-        c.setFont("Helvetica", 11)
-        c.drawString(95, y, step)
-
+    c.setFillColor(PRIMARY_BLUE)
+    runs = []
+    for step_num, step in enumerate(steps, start=1):
+        _draw_bullet(c, 75, y + 3, 8)
+        label = str(step_num)
+        label_x = 75 - c.stringWidth(label, "Helvetica-Bold", 9) / 2
+        runs.append((label_x, y, label, "Helvetica-Bold", 9, WHITE))
+        runs.append((95, y, step, "Helvetica", 11, DARK_GRAY))
         y -= 20
-        step_num += 1
+    _draw_text_runs(c, runs)
 
     y -= 30
 
     # Technology Stack
-    c.setFillColorRGB(*orange)
+    c.setFillColor(ORANGE)
     c.setFont("Helvetica-Bold", 18)
     c.drawString(60, y, "Powered By")
     y -= 30
 
-    c.setFillColorRGB(*dark_gray)
-    c.setFont("Helvetica", 11)
     tech = [
         "Google Gemini 2.0 Flash AI (Vision Analysis)",
         "PVLib Python (Solar Calculations)",
@@ -309,60 +321,80 @@ def create_proposal_pdf(output_path="Solar_AI_Platform_Proposal.pdf"):
         "Deployed on Vercel + Render (Free Tier)"
     ]
 
-    for t in tech:
-        c.setFillColorRGB(*primary_blue)
-        c.circle(70, y + 3, 2, fill=True, stroke=False)
-        c.setFillColorRGB(*dark_gray)
-        c.drawString(85, y, t)
-        y -= 18
+    c.setFillColor(PRIMARY_BLUE)
+    for i in range(len(tech)):
+        _draw_bullet(c, 70, y - 18 * i + 3, 2)
+    _draw_text_runs(c, [
+        (85, y - 18 * i, t, "Helvetica", 11, DARK_GRAY)
+        for i, t in enumerate(tech)
+    ])
+    y -= 18 * len(tech)
 
     y -= 30
 
     # Sample Report Note
     c.setFillColorRGB(0.95, 0.97, 1.0)
-    c.roundRect(60, y - 45, width - 120, 50, 8, fill=True, stroke=True)
-    c.setStrokeColorRGB(*primary_blue)
+    c.setStrokeColor(PRIMARY_BLUE)
     c.setLineWidth(1)
+    c.roundRect(60, y - 45, PAGE_WIDTH - 120, 50, 8, fill=True, stroke=True)
 
-    c.setFillColorRGB(*primary_blue)
+    c.setFillColor(PRIMARY_BLUE)
     c.setFont("Helvetica-Bold", 12)
-    c.drawCentredString(width/2, y - 15, "Sample Report Included")
-    c.setFillColorRGB(*dark_gray)
+    c.drawCentredString(CENTER_X, y - 15, "Sample Report Included")
+    c.setFillColor(DARK_GRAY)
     c.setFont("Helvetica", 10)
-    c.drawCentredString(width/2, y - 32, "We've included a sample analysis report for your reference")
+    c.drawCentredString(CENTER_X, y - 32, "We've included a sample analysis report for your reference")
 
     y -= 65
 
     # Call to Action Box
-    c.setFillColorRGB(*primary_blue)
-    c.roundRect(60, y - 100, width - 120, 110, 10, fill=True, stroke=False)
+    c.setFillColor(PRIMARY_BLUE)
+    c.roundRect(60, y - 100, PAGE_WIDTH - 120, 110, 10, fill=True, stroke=False)
 
-    c.setFillColorRGB(1, 1, 1)
+    c.setFillColor(WHITE)
     c.setFont("Helvetica-Bold", 20)
-    c.drawCentredString(width/2, y - 25, "Ready to Transform Your Business?")
+    c.drawCentredString(CENTER_X, y - 25, "Ready to Transform Your Business?")
 
     c.setFont("Helvetica", 12)
-    c.drawCentredString(width/2, y - 50, "Try it live at:")
+    c.drawCentredString(CENTER_X, y - 50, "Try it live at:")
 
     c.setFont("Helvetica-Bold", 14)
     c.setFillColorRGB(1, 1, 0.6)
-    c.drawCentredString(width/2, y - 70, "https://site-surver-analysis.vercel.app/")
+    c.drawCentredString(CENTER_X, y - 70, "https://site-surver-analysis.vercel.app/")
 
-    c.setFillColorRGB(1, 1, 1)
+    c.setFillColor(WHITE)
     c.setFont("Helvetica", 11)
-    c.drawCentredString(width/2, y - 92, "Contact us for a personalized demo with your project data")
+    c.drawCentredString(CENTER_X, y - 92, "Contact us for a personalized demo with your project data")
 
-    # Footer
-    c.setFillColorRGB(*primary_blue)
-    c.setFont("Helvetica-Bold", 10)
-    c.drawCentredString(width/2, 40, "Live Demo: https://site-surver-analysis.vercel.app/")
+    _draw_footer(c, 3)
 
-    c.setFillColorRGB(*light_gray)
-    c.setFont("Helvetica", 9)
-    c.drawRightString(width - 60, 20, "Page 3 of 3")
+@functools.lru_cache(maxsize=1)
+def _build_pdf_bytes() -> bytes:
+    """Render the proposal once; the content is static so the bytes are cached"""
+    buffer = BytesIO()
+    # invariant drops the creation timestamp so identical content gives identical bytes
+    c = canvas.Canvas(buffer, pagesize=letter, invariant=1)
+    _define_bullet_forms(c)
+
+    _draw_cover_page(c)
+    c.showPage()
+    _draw_differentiators_page(c)
+    c.showPage()
+    _draw_workflow_page(c)
 
     # Save PDF
     c.save()
+    return buffer.getvalue()
+
+def create_proposal_pdf(output_path="Solar_AI_Platform_Proposal.pdf"):
+    """Create a professional, concise proposal PDF"""
+    pdf = _build_pdf_bytes()
+    path = Path(output_path)
+    # Leave an identical file alone so its mtime (and any cached copies) stay valid
+    if path.is_file() and path.stat().st_size == len(pdf) and path.read_bytes() == pdf:
+        print(f"PDF up to date: {output_path}")
+        return
+    path.write_bytes(pdf)
     print(f"PDF generated: {output_path}")
 
 if __name__ == "__main__":
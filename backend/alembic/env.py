@@ -24,20 +24,49 @@ if DATABASE_URL:
 
 target_metadata = Base.metadata
 
+# Database-only objects added by migrations and deliberately left out of the models
+# (the PostGIS `polygon` columns, their GIST indexes and the *_invalid_wkt quarantine
+# tables); without this, autogenerate would propose dropping them
+UNMAPPED_COLUMNS = {("roof_planes", "polygon"), ("obstructions", "polygon")}
+UNMAPPED_INDEXES = {"ix_roof_planes_polygon", "ix_obstructions_polygon"}
+UNMAPPED_TABLE_SUFFIX = "_invalid_wkt"
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    if type_ == "column" and reflected and (object.table.name, name) in UNMAPPED_COLUMNS:
+        return False
+    if type_ == "index" and reflected and name in UNMAPPED_INDEXES:
+        return False
+    if type_ == "table" and reflected and name.endswith(UNMAPPED_TABLE_SUFFIX):
+        return False
+    return True
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
-    context.configure(url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True)
+    context.configure(
+        url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True,
+        include_object=include_object,
+    )
     with context.begin_transaction():
         context.run_migrations()
 
 def run_migrations_online() -> None:
+    # Alembic is single-threaded, so one pooled connection is reused for the whole
+    # run; set ALEMBIC_NULLPOOL=1 to open a fresh connection per checkout instead.
+    if os.getenv("ALEMBIC_NULLPOOL"):
+        pool_options = {"poolclass": pool.NullPool}
+    else:
+        pool_options = {"poolclass": pool.QueuePool, "pool_size": 1, "max_overflow": 0}
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section) or {},
         prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
+        **pool_options,
     )
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
+        context.configure(
+            connection=connection, target_metadata=target_metadata, compare_type=True,
+            include_object=include_object,
+        )
         with context.begin_transaction():
             context.run_migrations()
 
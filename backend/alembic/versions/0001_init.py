@@ -22,6 +22,8 @@ def upgrade() -> None:
         sa.Column("name", sa.String(255), nullable=False),
         sa.Column("address", sa.Text, nullable=True),
         sa.Column("status", sa.String(50), nullable=False, server_default="new"),
+        sa.Column("uploaded_image_url", sa.Text, nullable=True),
+        sa.Column("geometry_view_mode", sa.String(20), nullable=True, server_default="uploaded"),
         sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
     )
 
@@ -0,0 +1,24 @@
+"""add (project_id, id desc) index to analysis_results
+
+Revision ID: 5c2e8f1a9d47
+Revises: 8a307e271e82
+Create Date: 2026-10-16 09:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '5c2e8f1a9d47'
+down_revision = '8a307e271e82'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_analysis_results_project_id_id',
+        'analysis_results',
+        ['project_id', sa.text('id DESC')],
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_analysis_results_project_id_id', table_name='analysis_results')
@@ -6,17 +6,22 @@ Create Date: 2025-12-31 23:32:35.213021
 """
 
 from alembic import op
-import sqlalchemy as sa
 
 revision = '8a307e271e82'
 down_revision = '0001_init'
 branch_labels = None
 depends_on = None
 
+# Both columns are now created by 0001_init, so a fresh database only pays a
+# catalog check here. The guarded ALTER keeps databases that ran the original
+# 0001_init (without these columns) upgrading through the same revision chain.
+
 def upgrade() -> None:
-    op.add_column('projects', sa.Column('uploaded_image_url', sa.Text(), nullable=True))
-    op.add_column('projects', sa.Column('geometry_view_mode', sa.String(20), nullable=True, server_default='uploaded'))
+    op.execute("ALTER TABLE projects ADD COLUMN IF NOT EXISTS uploaded_image_url TEXT")
+    op.execute(
+        "ALTER TABLE projects ADD COLUMN IF NOT EXISTS geometry_view_mode VARCHAR(20) DEFAULT 'uploaded'"
+    )
 
 def downgrade() -> None:
-    op.drop_column('projects', 'geometry_view_mode')
-    op.drop_column('projects', 'uploaded_image_url')
+    # The columns belong to 0001_init now; dropping them is that revision's job
+    pass
@@ -0,0 +1,70 @@
+"""add indexed PostGIS geometry alongside polygon_wkt
+
+Revision ID: 9b4d7e3c1f20
+Revises: 5c2e8f1a9d47
+Create Date: 2026-10-16 09:30:00.000000
+"""
+
+from alembic import op
+
+revision = '9b4d7e3c1f20'
+down_revision = '5c2e8f1a9d47'
+branch_labels = None
+depends_on = None
+
+# polygon_wkt stays the source of truth for the API and services; the stored
+# generated column is parsed once on write and backs spatial queries via GIST.
+# Coordinates are local metres, so no SRID is assigned.
+TABLES = ('roof_planes', 'obstructions')
+
+# The generated column is computed for every existing row, so one legacy polygon_wkt
+# that PostGIS can't parse would abort the ALTER. Such rows are moved, unchanged, to
+# {table}_invalid_wkt (reported with a WARNING) to be fixed and copied back by hand;
+# the table is dropped again when nothing needed moving.
+QUARANTINE_INVALID_WKT = """
+CREATE TABLE IF NOT EXISTS {table}_invalid_wkt (LIKE {table});
+DO $$
+DECLARE
+    row_id integer;
+    wkt text;
+BEGIN
+    FOR row_id, wkt IN SELECT id, polygon_wkt FROM {table} LOOP
+        BEGIN
+            PERFORM ST_GeomFromText(wkt);
+        EXCEPTION WHEN others THEN
+            RAISE WARNING '{table} id %: unparseable polygon_wkt moved to {table}_invalid_wkt', row_id;
+            INSERT INTO {table}_invalid_wkt SELECT * FROM {table} WHERE id = row_id;
+            DELETE FROM {table} WHERE id = row_id;
+        END;
+    END LOOP;
+    IF NOT EXISTS (SELECT 1 FROM {table}_invalid_wkt) THEN
+        DROP TABLE {table}_invalid_wkt;
+    END IF;
+END $$;
+"""
+
+RESTORE_INVALID_WKT = """
+DO $$
+BEGIN
+    IF to_regclass('{table}_invalid_wkt') IS NOT NULL THEN
+        INSERT INTO {table} SELECT * FROM {table}_invalid_wkt;
+        DROP TABLE {table}_invalid_wkt;
+    END IF;
+END $$;
+"""
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(QUARANTINE_INVALID_WKT.format(table=table))
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN polygon geometry "
+            f"GENERATED ALWAYS AS (ST_GeomFromText(polygon_wkt)) STORED"
+        )
+        op.create_index(f'ix_{table}_polygon', table, ['polygon'], postgresql_using='gist')
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_polygon', table_name=table)
+        op.drop_column(table, 'polygon')
+        # Quarantined rows fit the table again once the generated column is gone
+        op.execute(RESTORE_INVALID_WKT.format(table=table))
@@ -0,0 +1,54 @@
+"""store roof plane area alongside polygon_wkt
+
+Revision ID: b5e9d2a7c418
+Revises: f1c6d8e3a274
+Create Date: 2026-10-16 14:00:00.000000
+"""
+
+from alembic import op
+
+revision = 'b5e9d2a7c418'
+down_revision = 'f1c6d8e3a274'
+branch_labels = None
+depends_on = None
+
+# Like the `polygon` geometry, the area is generated from polygon_wkt on write, so
+# compliance reads it with the plane instead of parsing WKT on every run. Generated
+# columns cannot reference each other, hence the second ST_GeomFromText.
+
+# Like 9b4d7e3c1f20, rows whose polygon_wkt PostGIS can't parse are moved to
+# roof_planes_invalid_wkt before the ALTER instead of aborting it. Rows that got a
+# `polygon` on write already parse, so this normally moves nothing. The quarantine
+# table keeps the columns from before the generated ones (9b4d7e3c1f20's downgrade
+# restores from it), hence the explicit column list.
+COLUMNS = "id, project_id, name, tilt_deg, azimuth_deg, polygon_wkt, created_at"
+QUARANTINE_INVALID_WKT = f"""
+DO $$
+DECLARE
+    row_id integer;
+    wkt text;
+BEGIN
+    FOR row_id, wkt IN SELECT id, polygon_wkt FROM roof_planes LOOP
+        BEGIN
+            PERFORM ST_Area(ST_GeomFromText(wkt));
+        EXCEPTION WHEN others THEN
+            RAISE WARNING 'roof_planes id %: unparseable polygon_wkt moved to roof_planes_invalid_wkt', row_id;
+            IF to_regclass('roof_planes_invalid_wkt') IS NULL THEN
+                CREATE TABLE roof_planes_invalid_wkt AS SELECT {COLUMNS} FROM roof_planes WITH NO DATA;
+            END IF;
+            INSERT INTO roof_planes_invalid_wkt ({COLUMNS}) SELECT {COLUMNS} FROM roof_planes WHERE id = row_id;
+            DELETE FROM roof_planes WHERE id = row_id;
+        END;
+    END LOOP;
+END $$;
+"""
+
+def upgrade() -> None:
+    op.execute(QUARANTINE_INVALID_WKT)
+    op.execute(
+        "ALTER TABLE roof_planes ADD COLUMN area_m2 double precision "
+        "GENERATED ALWAYS AS (ST_Area(ST_GeomFromText(polygon_wkt))) STORED"
+    )
+
+def downgrade() -> None:
+    op.drop_column('roof_planes', 'area_m2')
@@ -0,0 +1,44 @@
+"""store JSON columns as JSONB
+
+Revision ID: c7a1e5d93b08
+Revises: 9b4d7e3c1f20
+Create Date: 2026-10-16 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = 'c7a1e5d93b08'
+down_revision = '9b4d7e3c1f20'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ('assets', 'meta'),
+    ('layouts', 'data'),
+    ('rulesets', 'rules'),
+    ('reports', 'meta'),
+    ('analysis_results', 'result'),
+)
+
+def _retype(type_, cast: str) -> None:
+    # The '{}'::json defaults cannot be cast in place, so drop and re-add them
+    for table, column in COLUMNS:
+        op.alter_column(table, column, server_default=None)
+        op.alter_column(table, column, type_=type_, postgresql_using=f"{column}::{cast}")
+        op.alter_column(table, column, server_default=sa.text(f"'{{}}'::{cast}"))
+
+def upgrade() -> None:
+    _retype(postgresql.JSONB(), 'jsonb')
+    op.create_index(
+        'ix_analysis_results_result_gin',
+        'analysis_results',
+        ['result'],
+        postgresql_using='gin',
+        postgresql_ops={'result': 'jsonb_path_ops'},
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_analysis_results_result_gin', table_name='analysis_results')
+    _retype(sa.JSON(), 'json')
@@ -0,0 +1,32 @@
+"""add trigram indexes for project name/address search
+
+Revision ID: d3f8b2a61c5e
+Revises: c7a1e5d93b08
+Create Date: 2026-10-16 11:00:00.000000
+"""
+
+from alembic import op
+
+revision = 'd3f8b2a61c5e'
+down_revision = 'c7a1e5d93b08'
+branch_labels = None
+depends_on = None
+
+# list_projects searches with unanchored ILIKE '%term%', which only a trigram index can serve
+COLUMNS = ('name', 'address')
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in COLUMNS:
+        op.create_index(
+            f'ix_projects_{column}_trgm',
+            'projects',
+            [column],
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+def downgrade() -> None:
+    for column in COLUMNS:
+        op.drop_index(f'ix_projects_{column}_trgm', table_name='projects')
+    # The extension is left installed; other objects may depend on it
@@ -0,0 +1,23 @@
+"""add latitude/longitude to projects
+
+Revision ID: e4b7a2c9d016
+Revises: d3f8b2a61c5e
+Create Date: 2026-10-16 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'e4b7a2c9d016'
+down_revision = 'd3f8b2a61c5e'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Nullable without a default, so Postgres adds them without rewriting the table
+    op.add_column('projects', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('projects', sa.Column('longitude', sa.Float(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('projects', 'longitude')
+    op.drop_column('projects', 'latitude')
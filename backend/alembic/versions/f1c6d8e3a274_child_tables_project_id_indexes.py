@@ -0,0 +1,28 @@
+"""add (project_id, id desc) indexes to the per-project tables
+
+Revision ID: f1c6d8e3a274
+Revises: e4b7a2c9d016
+Create Date: 2026-10-16 12:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'f1c6d8e3a274'
+down_revision = 'e4b7a2c9d016'
+branch_labels = None
+depends_on = None
+
+# Every read of these tables filters on project_id, and the list endpoints return
+# newest first, so (project_id, id DESC) serves both the filter and the ORDER BY.
+# It also backs the ON DELETE CASCADE lookups when a project is deleted.
+# analysis_results already has this index (5c2e8f1a9d47).
+TABLES = ('assets', 'roof_planes', 'obstructions', 'layouts', 'reports')
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_index(f'ix_{table}_project_id_id', table, ['project_id', sa.text('id DESC')])
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_project_id_id', table_name=table)
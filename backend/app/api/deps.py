@@ -1,4 +1,11 @@
-from app.db.session import SessionLocal
+from contextlib import contextmanager
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.services.cache import get_cached_response, cache_response
 
 def get_db():
     db = SessionLocal()
@@ -6,3 +13,69 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+FOREIGN_KEY_VIOLATION = "23503"
+
+# Upper bound on rows accepted by the bulk create endpoints in one request
+MAX_BULK_ITEMS = 1000
+
+def _is_fk_violation(e: IntegrityError) -> bool:
+    return getattr(e.orig, "sqlstate", None) == FOREIGN_KEY_VIOLATION
+
+@contextmanager
+def fk_violation_as_404(db: Session, detail: str = "Project not found"):
+    """Roll back and raise a 404 if the block hits a foreign key violation"""
+    try:
+        yield
+    except IntegrityError as e:
+        db.rollback()
+        if _is_fk_violation(e):
+            raise HTTPException(status_code=404, detail=detail)
+        raise
+
+def commit_or_404(db: Session, detail: str = "Project not found") -> None:
+    """
+    Commit, turning a foreign key violation into a 404.
+    Lets create endpoints skip a SELECT existence check and rely on the FK instead.
+    """
+    with fk_violation_as_404(db, detail):
+        db.commit()
+
+async def async_commit_or_404(db: AsyncSession, detail: str = "Project not found") -> None:
+    """commit_or_404 for async sessions"""
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_fk_violation(e):
+            raise HTTPException(status_code=404, detail=detail)
+        raise
+
+# List endpoints are polled; clients revalidate every second and get a bodiless 304
+# while nothing in the collection has changed
+LIST_CACHE_CONTROL = "private, max-age=1, must-revalidate"
+
+def list_etag(*parts) -> str:
+    """Weak ETag from values that change whenever the collection does (count, max id, body hash, ...)"""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
+def cached_list_body(namespace: str, key: str, adapter: TypeAdapter, load) -> bytes:
+    """
+    JSON body for a list endpoint from the response cache, or from load() and then cached.
+    load() queries use raiseload("*"), so a response model that starts touching a
+    relationship fails loudly instead of issuing one lazy SELECT per row.
+    """
+    body, generation = get_cached_response(namespace, key)
+    if body is None:
+        body = adapter.dump_json(adapter.validate_python(load(), from_attributes=True))
+        cache_response(namespace, key, body, generation)
+    return body
@@ -1,156 +1,258 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.api.deps import get_db
-from app.api.schemas import AnalysisOut
-from app.db.models import AnalysisResult, Project, Asset
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks, Query, Request, Response
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, exists, func, literal
+from app.api.deps import get_db, get_async_db, async_commit_or_404, LIST_CACHE_CONTROL, list_etag, etag_matches
+from app.api.schemas import AnalysisOut, AnalysisKind, AnalysisPage, HybridReplayIn, HybridReplayOut
+from app.core.config import settings
+from app.db.models import AnalysisResult, Project, Asset, RoofPlane, Obstruction, Layout, JSONType
+from app.services.compliance import run_compliance_analysis
+from app.services.electrical import run_electrical_analysis
+from app.services.hybrid_scoring import compute_hybrid_scores
+from app.services.cache import invalidate_responses
+from app.services.roof_risk import run_roof_risk
+from app.services.shading import run_shading_analysis, run_ai_vision_shading
+from app.services.storage import project_upload_dir, save_upload, write_upload, remove_tree, remove_upload
+from app.services.tasks import enqueue
 from typing import List
-import json
+import asyncio
+import orjson
 import os
-import shutil
-from datetime import datetime
+import secrets
 
 router = APIRouter(tags=["analysis"])
 
-VALID_ANALYSIS_KINDS = {"shading", "compliance", "roof_risk", "electrical"}
+# Resolved once at import: without a Gemini key the AI module is never loaded and
+# shading runs skip the AI branch entirely
+AI_ENABLED = bool(settings.GEMINI_API_KEY)
+if AI_ENABLED:
+    from app.services.gemini_vision import analyze_shading_from_geometry_data
+
+async def _insert_analysis_if_project_exists(db: AsyncSession, project_id: int, kind: str, status: str):
+    """INSERT ... SELECT ... WHERE EXISTS ... RETURNING in one round-trip; None if the project is missing"""
+    stmt = (
+        insert(AnalysisResult)
+        .from_select(
+            ["project_id", "kind", "status", "result"],
+            select(literal(project_id), literal(kind), literal(status), literal({}, JSONType))
+            .where(exists().where(Project.id == project_id)),
+        )
+        .returning(AnalysisResult)
+    )
+    return (await db.scalars(stmt)).one_or_none()
+
+@router.post("/analysis/replay", response_model=HybridReplayOut)
+def replay_hybrid_scores(payload: HybridReplayIn):
+    """Recompute hybrid shading scores for many (math, AI) score pairs at once"""
+    if len(payload.math_scores) != len(payload.ai_scores):
+        raise HTTPException(status_code=400, detail="math_scores and ai_scores must be the same length")
+
+    hybrid_scores, _, confidences = compute_hybrid_scores(payload.math_scores, payload.ai_scores)
+    return HybridReplayOut(
+        hybrid_scores=[round(score, 1) for score in hybrid_scores.tolist()],
+        confidence=confidences.tolist(),
+    )
+
+@router.get("/analysis/{analysis_id}", response_model=AnalysisOut)
+async def get_analysis(analysis_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get a single analysis result; poll this while a queued run is in progress"""
+    rec = await db.get(AnalysisResult, analysis_id)
+    if not rec:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return rec
+
+@router.delete("/analysis/{analysis_id}")
+def delete_analysis(analysis_id: int, db: Session = Depends(get_db)):
+    """Delete an analysis result"""
+    # Bulk DELETE: no SELECT to load the row (and its result blob) first
+    result = db.execute(delete(AnalysisResult).where(AnalysisResult.id == analysis_id))
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    db.commit()
+    return {"message": "Analysis deleted successfully"}
+
+@router.get("/projects/{project_id}/analysis", response_model=AnalysisPage)
+async def list_analysis(
+    project_id: int,
+    request: Request,
+    limit: int = Query(50, ge=1, le=100, description="Items per page (max 100)"),
+    before_id: int | None = Query(None, description="Return results older than this analysis id"),
+    fields: str | None = Query(None, description="Comma-separated columns to return, e.g. id,kind,status,created_at"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List analysis results for a project, newest first.
+    Uses keyset pagination on id; pass next_before_id back as before_id for the next page.
+    Rows are read as plain mappings and encoded straight to JSON with orjson, skipping
+    ORM instances and AnalysisPage validation for the large result blobs.
+    Pass fields to leave out columns you don't need (the result JSON is by far the largest).
+    Responses carry a weak ETag; send it back as If-None-Match to get a 304 when nothing changed.
+    """
+    columns = AnalysisResult.__table__.c
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        if "id" not in names:
+            names.insert(0, "id")  # Needed for next_before_id
+        selected = [columns[name] for name in names]
+    else:
+        selected = list(columns)
 
-@router.get("/projects/{project_id}/analysis", response_model=list[AnalysisOut])
-def list_analysis(project_id: int, db: Session = Depends(get_db)):
-    """List all analysis results for a project"""
-    return list(db.execute(
-        select(AnalysisResult)
+    # Status updates rewrite rows in place, so max(updated_at) is part of the tag
+    count, max_id, max_updated = (await db.execute(
+        select(func.count(), func.max(AnalysisResult.id), func.max(AnalysisResult.updated_at))
+        .where(AnalysisResult.project_id == project_id)
+    )).one()
+    etag = list_etag(count, max_id or 0, max_updated.timestamp() if max_updated else 0)
+    cache_headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    query = (
+        select(*selected)
         .where(AnalysisResult.project_id == project_id)
         .order_by(AnalysisResult.id.desc())
-    ).scalars().all())
+        .limit(limit + 1)
+    )
+    if before_id is not None:
+        query = query.where(AnalysisResult.id < before_id)
+
+    rows = (await db.execute(query)).mappings().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    page = {
+        "data": [dict(row) for row in rows],
+        "next_before_id": rows[-1]["id"] if has_more else None,
+    }
+    return Response(orjson.dumps(page, option=orjson.OPT_UTC_Z), media_type="application/json", headers=cache_headers)
 
 @router.post("/projects/{project_id}/analysis/shading/run_with_screenshot", response_model=AnalysisOut)
 async def run_shading_with_screenshot(
     project_id: int,
+    background_tasks: BackgroundTasks,
     geometry_screenshot: UploadFile = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Run shading analysis with optional geometry screenshot for AI enhancement.
 
     If geometry_screenshot is provided, saves it as an asset and uses it for hybrid AI+math analysis.
     """
-    project = db.get(Project, project_id)
-    if not project:
+    if await db.scalar(select(Project.id).where(Project.id == project_id)) is None:
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Save geometry screenshot if provided
     geometry_asset = None
     if geometry_screenshot:
+        upload_dir = project_upload_dir(project_id)
+        filename = None
         try:
-            upload_dir = f"storage/uploads/project_{project_id}"
-            os.makedirs(upload_dir, exist_ok=True)
-
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            filename = f"geometry_{timestamp}_{geometry_screenshot.filename}"
-            file_path = os.path.join(upload_dir, filename)
-
-            # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(geometry_screenshot.file, buffer)
+            # Save file (content-addressed, so a repeated screenshot reuses the stored copy)
+            filename, file_size, sha256 = await save_upload(geometry_screenshot, upload_dir, "geometry")
 
             # Create asset record
             geometry_asset = Asset(
                 project_id=project_id,
                 kind="geometry_screenshot",
-                storage_url=f"/{file_path}",
-                metadata={"timestamp": timestamp}
+                filename=filename,
+                content_type=geometry_screenshot.content_type,
+                storage_url=f"/storage/uploads/project_{project_id}/{filename}",
+                meta={
+                    "file_size": file_size,
+                    "sha256": sha256,
+                    "original_filename": geometry_screenshot.filename,
+                }
             )
             db.add(geometry_asset)
-            db.commit()
-            db.refresh(geometry_asset)
+            # The project can be deleted between the check above and this commit
+            await async_commit_or_404(db)
+        except HTTPException:
+            # Nothing can reference files of a project that doesn't exist
+            await asyncio.to_thread(remove_tree, upload_dir)
+            raise
         except Exception as e:
             # Continue without geometry screenshot if upload fails
-            pass
+            await db.rollback()
+            if filename is not None:
+                await asyncio.to_thread(remove_upload, os.path.join(upload_dir, filename))
+        else:
+            await asyncio.to_thread(invalidate_responses, f"project:{project_id}")
 
     # Now run the shading analysis (it will find the geometry_screenshot we just created)
-    return run_analysis(project_id, "shading", db)
+    return await run_analysis(project_id, AnalysisKind.shading, background_tasks, db)
 
 
 @router.post("/projects/{project_id}/analysis/{kind}/run", response_model=AnalysisOut)
-def run_analysis(project_id: int, kind: str, db: Session = Depends(get_db)):
+async def run_analysis(
+    project_id: int,
+    kind: AnalysisKind,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
     """Trigger analysis run for a specific kind"""
-    project = db.get(Project, project_id)
-    if not project:
+    status = "queued" if settings.ANALYSIS_WORKER_ENABLED else "running"
+    rec = await _insert_analysis_if_project_exists(db, project_id, kind.value, status)
+    if rec is None:
         raise HTTPException(status_code=404, detail="Project not found")
+    await db.commit()
 
-    if kind not in VALID_ANALYSIS_KINDS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid analysis kind. Must be one of: {', '.join(VALID_ANALYSIS_KINDS)}"
-        )
-
-    rec = AnalysisResult(project_id=project_id, kind=kind, status="running", result={})
-    db.add(rec)
-    db.commit()
-    db.refresh(rec)
-
-    # Run analysis synchronously (Celery worker not available on free tier)
-    from sqlalchemy import select
-    from app.db.models import RoofPlane, Obstruction, Layout, Asset
+    if settings.ANALYSIS_WORKER_ENABLED:
+        # Broker round-trip happens after the response is sent
+        background_tasks.add_task(enqueue, "enqueue_analysis", rec.id, kind.value, project_id)
+        return rec
 
+    # Run analysis in-process (Celery worker not available on free tier); the
+    # CPU-bound and blocking service calls run in a thread to keep the loop free
     if kind == "shading":
-        from app.services.shading import run_shading_analysis
-        planes = db.execute(select(RoofPlane).where(RoofPlane.project_id == project_id)).scalars().all()
-        obs = db.execute(select(Obstruction).where(Obstruction.project_id == project_id)).scalars().all()
-
-        # HYBRID APPROACH: Run mathematical analysis first
-        math_result = run_shading_analysis(
-            roof_planes=[{
-                "id": p.id,
-                "polygon_wkt": p.polygon_wkt,
-                "name": p.name,
-                "tilt_deg": p.tilt_deg,
-                "azimuth_deg": p.azimuth_deg
-            } for p in planes],
-            obstructions=[{
-                "id": o.id,
-                "polygon_wkt": o.polygon_wkt,
-                "type": o.type,
-                "height_m": o.height_m
-            } for o in obs],
+        # One projection per row feeds both the math and the AI call; the AI prompt only
+        # reads the fields it needs and ignores polygon_wkt
+        roof_planes_data = [dict(row) for row in (await db.execute(
+            select(RoofPlane.id, RoofPlane.polygon_wkt, RoofPlane.name, RoofPlane.tilt_deg, RoofPlane.azimuth_deg)
+            .where(RoofPlane.project_id == project_id)
+        )).mappings()]
+        obstructions_data = [dict(row) for row in (await db.execute(
+            select(Obstruction.id, Obstruction.polygon_wkt, Obstruction.type, Obstruction.height_m)
+            .where(Obstruction.project_id == project_id)
+        )).mappings()]
+        location = None
+        if AI_ENABLED and roof_planes_data and obstructions_data:
+            location = (await db.execute(
+                select(Project.latitude, Project.longitude).where(Project.id == project_id)
+            )).one()
+
+        # Close the session so its read transaction doesn't hold a pooled connection
+        # through the shapely math and the AI round-trip; the result is written below
+        # in a short transaction of its own
+        await db.close()
+
+        # HYBRID APPROACH: mathematical analysis, plus AI analysis if possible
+        math_analysis = asyncio.to_thread(
+            run_shading_analysis,
+            roof_planes=roof_planes_data,
+            obstructions=obstructions_data,
         )
 
-        # Try to enhance with AI analysis if possible
-        # NEW: Run AI analysis using geometry data (no screenshot needed!)
-        from app.core.config import settings
-
         ai_result = None
 
-        if settings.GEMINI_API_KEY and len(planes) > 0 and len(obs) > 0:
-            # Use NEW geometry-only AI analysis
-            try:
-                from app.services.gemini_vision import analyze_shading_from_geometry_data
-
-                roof_planes_data = [{
-                    "id": p.id,
-                    "name": p.name,
-                    "tilt_deg": p.tilt_deg,
-                    "azimuth_deg": p.azimuth_deg
-                } for p in planes]
-
-                obstructions_data = [{
-                    "id": o.id,
-                    "type": o.type,
-                    "height_m": o.height_m
-                } for o in obs]
-
-                latitude = getattr(project, 'latitude', None)
-                longitude = getattr(project, 'longitude', None)
-
-                ai_result = analyze_shading_from_geometry_data(
-                    roof_planes_data,
-                    obstructions_data,
-                    latitude,
-                    longitude
-                )
-            except Exception as e:
+        if location is not None:
+            # Geometry-only AI analysis (no screenshot needed). Neither side depends on the
+            # other, so the shapely math and the Gemini round-trip run concurrently.
+            math_result, ai_result = await asyncio.gather(
+                math_analysis,
+                asyncio.to_thread(analyze_shading_from_geometry_data, roof_planes_data, obstructions_data, *location),
+                return_exceptions=True,
+            )
+            if isinstance(math_result, BaseException):
+                raise math_result
+            if isinstance(ai_result, Exception):
                 # AI failed, continue with math-only result
-                math_result["ai_enhancement_error"] = str(e)
+                math_result["ai_enhancement_error"] = str(ai_result)
+                ai_result = None
+        else:
+            math_result = await math_analysis
 
         # Combine mathematical and AI results for hybrid analysis
         if ai_result and "error" not in ai_result:
@@ -158,19 +260,11 @@ def run_analysis(project_id: int, kind: str, db: Session = Depends(get_db)):
             math_score = math_result.get("average_shade_risk", 0)
             ai_score = ai_result.get("overall_shade_risk_score", 0)
 
-            # Weighted average: 40% math, 60% AI (AI is more accurate for visual analysis)
-            hybrid_score = (math_score * 0.4) + (ai_score * 0.6)
-
-            # Calculate confidence based on agreement
-            score_diff = abs(math_score - ai_score)
-            if score_diff < 10:
-                confidence = "very_high"
-            elif score_diff < 20:
-                confidence = "high"
-            elif score_diff < 30:
-                confidence = "medium"
-            else:
-                confidence = "low"
+            # Weighted blend plus a confidence label from how closely the two agree
+            hybrid_scores, score_diffs, confidences = compute_hybrid_scores([math_score], [ai_score])
+            hybrid_score = float(hybrid_scores[0])
+            score_diff = float(score_diffs[0])
+            confidence = str(confidences[0])
 
             rec.result = {
                 "analysis_method": "hybrid_math_ai",
@@ -213,9 +307,8 @@ def run_analysis(project_id: int, kind: str, db: Session = Depends(get_db)):
             else:
                 rec.result["ai_note"] = "Upload a geometry screenshot to enable AI-enhanced hybrid analysis"
     elif kind == "compliance":
-        from app.services.compliance import run_compliance_analysis
-        planes = db.execute(select(RoofPlane).where(RoofPlane.project_id == project_id)).scalars().all()
-        layouts = db.execute(select(Layout).where(Layout.project_id == project_id)).scalars().all()
+        planes = (await db.execute(select(RoofPlane).where(RoofPlane.project_id == project_id))).scalars().all()
+        layouts = (await db.execute(select(Layout).where(Layout.project_id == project_id))).scalars().all()
 
         layout_dicts = []
         for l in layouts:
@@ -227,177 +320,284 @@ def run_analysis(project_id: int, kind: str, db: Session = Depends(get_db)):
                 "offset_from_edge_m": layout_data.get("offset_from_edge_m", 0.0),
                 "layout_config": layout_data.get("layout_config", {})
             })
-
-        rec.result = run_compliance_analysis(
-            roof_planes=[{
-                "id": p.id,
-                "polygon_wkt": p.polygon_wkt,
-                "name": p.name,
-                "tilt_deg": p.tilt_deg,
-                "azimuth_deg": p.azimuth_deg
-            } for p in planes],
-            layouts=layout_dicts
-        )
+        plane_dicts = [{
+            "id": p.id,
+            "polygon_wkt": p.polygon_wkt,
+            "name": p.name,
+            "tilt_deg": p.tilt_deg,
+            "azimuth_deg": p.azimuth_deg,
+            "area_m2": p.area_m2
+        } for p in planes]
+        await db.close()
+
+        rec.result = await asyncio.to_thread(run_compliance_analysis, roof_planes=plane_dicts, layouts=layout_dicts)
     elif kind == "roof_risk":
-        from app.services.roof_risk import run_roof_risk
-        imgs = db.execute(select(Asset).where(Asset.project_id == project_id, Asset.kind == "photo")).scalars().all()
-        rec.result = run_roof_risk([a.storage_url for a in imgs], {})
+        image_urls = (await db.execute(
+            select(Asset.storage_url).where(Asset.project_id == project_id, Asset.kind == "photo")
+        )).scalars().all()
+        await db.close()
+        rec.result = await asyncio.to_thread(run_roof_risk, image_urls, {})
     elif kind == "electrical":
         rec.result = {"summary": "Use the /projects/{id}/analysis/electrical/run_with_data endpoint with panel data"}
-    else:
-        rec.result = {"summary": f"Unknown analysis kind: {kind}"}
 
+    # rec was detached when the session closed; add() brings it back for the UPDATE
     rec.status = "done"
-    db.commit()
+    db.add(rec)
+    await db.commit()
 
     return rec
 
 @router.post("/projects/{project_id}/analysis/roof_risk/run_with_data", response_model=AnalysisOut)
 async def run_roof_risk_with_data(
     project_id: int,
+    background_tasks: BackgroundTasks,
     images: List[UploadFile] = File(...),
     survey_data: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Run roof risk analysis with uploaded images and survey data"""
-    project = db.get(Project, project_id)
-    if not project:
+    if await db.scalar(select(Project.id).where(Project.id == project_id)) is None:
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Parse survey data
     try:
-        survey_dict = json.loads(survey_data)
-    except json.JSONDecodeError:
+        survey_dict = orjson.loads(survey_data)
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid survey data JSON")
 
     # Save uploaded images as assets
-    upload_dir = f"storage/uploads/project_{project_id}"
-    os.makedirs(upload_dir, exist_ok=True)
+    upload_dir = project_upload_dir(project_id)
 
     saved_image_urls = []
     saved_image_paths = []
+    asset_rows = []
 
     for image in images:
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        filename = f"roof_{timestamp}_{image.filename}"
+        # Save file under its content hash; re-uploads of the same image share one copy
+        filename, file_size, sha256 = await save_upload(image, upload_dir, "roof")
         file_path = os.path.join(upload_dir, filename)
 
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-
-        # Create asset record
-        asset = Asset(
-            project_id=project_id,
-            kind="photo",
-            filename=filename,
-            storage_url=f"/storage/uploads/project_{project_id}/{filename}",
-            content_type=image.content_type,
-            meta={"file_size": os.path.getsize(file_path), "source": "roof_risk_analysis"}
-        )
-        db.add(asset)
-        saved_image_urls.append(asset.storage_url)
+        asset_rows.append({
+            "project_id": project_id,
+            "kind": "photo",
+            "filename": filename,
+            "storage_url": f"/storage/uploads/project_{project_id}/{filename}",
+            "content_type": image.content_type,
+            "meta": {
+                "file_size": file_size,
+                "source": "roof_risk_analysis",
+                "sha256": sha256,
+                "original_filename": image.filename,
+            },
+        })
+        saved_image_urls.append(asset_rows[-1]["storage_url"])
         saved_image_paths.append(file_path)
 
-    db.commit()
+    # One executemany for all asset rows, committed together with the analysis record
+    if asset_rows:
+        await db.execute(insert(Asset), asset_rows)
 
     # Create analysis result record
-    rec = AnalysisResult(
-        project_id=project_id,
-        kind="roof_risk",
-        status="queued",
-        result={}
-    )
-    db.add(rec)
-    db.commit()
-    db.refresh(rec)
-
-    # Run analysis synchronously (Celery worker not available on free tier)
-    from app.services.roof_risk import run_roof_risk
+    rec = (await db.scalars(
+        insert(AnalysisResult)
+        .values(project_id=project_id, kind="roof_risk", status="queued", result={})
+        .returning(AnalysisResult)
+    )).one()
+    await db.commit()
+    if asset_rows:
+        await asyncio.to_thread(invalidate_responses, f"project:{project_id}")
+
+    if settings.ANALYSIS_WORKER_ENABLED:
+        # Images are already on disk, so the task only needs their paths
+        background_tasks.add_task(enqueue, "enqueue_roof_risk_with_data", rec.id, project_id, saved_image_paths, survey_dict)
+        return rec
+
+    # Run analysis in-process (Celery worker not available on free tier)
     rec.status = "running"
-    db.commit()
+    await db.commit()
 
-    rec.result = run_roof_risk(saved_image_urls, survey_dict, saved_image_paths)
+    rec.result = await asyncio.to_thread(run_roof_risk, saved_image_urls, survey_dict, saved_image_paths)
     rec.result["uploaded_images"] = saved_image_urls
     rec.result["image_count"] = len(saved_image_urls)
 
     rec.status = "done"
-    db.commit()
+    await db.commit()
 
     return rec
 
 @router.post("/projects/{project_id}/analysis/electrical/run_with_data", response_model=AnalysisOut)
 async def run_electrical_with_data(
     project_id: int,
+    background_tasks: BackgroundTasks,
     images: List[UploadFile] = File(default=[]),
     electrical_data: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Run electrical analysis with optional panel images and electrical specifications"""
-    project = db.get(Project, project_id)
-    if not project:
+    if await db.scalar(select(Project.id).where(Project.id == project_id)) is None:
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Parse electrical data
     try:
-        electrical_dict = json.loads(electrical_data)
-    except json.JSONDecodeError:
+        electrical_dict = orjson.loads(electrical_data)
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid electrical data JSON")
 
     # Save uploaded panel images as assets (optional)
-    upload_dir = f"storage/uploads/project_{project_id}"
-    os.makedirs(upload_dir, exist_ok=True)
+    upload_dir = project_upload_dir(project_id)
 
     saved_image_urls = []
     saved_image_paths = []
+    asset_rows = []
 
     for image in images:
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        filename = f"panel_{timestamp}_{image.filename}"
+        # Save file under its content hash; re-uploads of the same image share one copy
+        filename, file_size, sha256 = await save_upload(image, upload_dir, "panel")
         file_path = os.path.join(upload_dir, filename)
 
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-
-        # Create asset record
-        asset = Asset(
-            project_id=project_id,
-            kind="photo",
-            filename=filename,
-            storage_url=f"/storage/uploads/project_{project_id}/{filename}",
-            content_type=image.content_type,
-            meta={"file_size": os.path.getsize(file_path), "source": "electrical_analysis"}
-        )
-        db.add(asset)
-        saved_image_urls.append(asset.storage_url)
+        asset_rows.append({
+            "project_id": project_id,
+            "kind": "photo",
+            "filename": filename,
+            "storage_url": f"/storage/uploads/project_{project_id}/{filename}",
+            "content_type": image.content_type,
+            "meta": {
+                "file_size": file_size,
+                "source": "electrical_analysis",
+                "sha256": sha256,
+                "original_filename": image.filename,
+            },
+        })
+        saved_image_urls.append(asset_rows[-1]["storage_url"])
         saved_image_paths.append(file_path)
 
-    db.commit()
+    # One executemany for all asset rows, committed together with the analysis record
+    if asset_rows:
+        await db.execute(insert(Asset), asset_rows)
 
     # Create analysis result record
-    rec = AnalysisResult(
-        project_id=project_id,
-        kind="electrical",
-        status="queued",
-        result={}
-    )
-    db.add(rec)
-    db.commit()
-    db.refresh(rec)
-
-    # Run analysis synchronously (Celery worker not available on free tier)
-    from app.services.electrical import run_electrical_analysis
+    rec = (await db.scalars(
+        insert(AnalysisResult)
+        .values(project_id=project_id, kind="electrical", status="queued", result={})
+        .returning(AnalysisResult)
+    )).one()
+    await db.commit()
+    if asset_rows:
+        await asyncio.to_thread(invalidate_responses, f"project:{project_id}")
+
+    if settings.ANALYSIS_WORKER_ENABLED:
+        # Images are already on disk, so the task only needs their paths
+        background_tasks.add_task(enqueue, "enqueue_electrical_with_data", rec.id, project_id, saved_image_paths, electrical_dict)
+        return rec
+
+    # Run analysis in-process (Celery worker not available on free tier)
     rec.status = "running"
-    db.commit()
+    await db.commit()
 
-    rec.result = run_electrical_analysis(electrical_dict, saved_image_paths if saved_image_paths else None)
+    rec.result = await asyncio.to_thread(run_electrical_analysis, electrical_dict, saved_image_paths if saved_image_paths else None)
     rec.result["uploaded_images"] = saved_image_urls
     rec.result["image_count"] = len(saved_image_urls)
 
     rec.status = "done"
-    db.commit()
+    await db.commit()
+
+    return rec
+
+@router.post("/projects/{project_id}/analysis/shading/ai_vision", response_model=AnalysisOut)
+async def run_shading_with_ai_vision(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    geometry_image: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Run AI-powered shading analysis using Gemini Vision to analyze geometry editor screenshot.
+
+    Upload an image showing:
+    - GREEN areas = Solar panels on roof
+    - RED areas = Obstructions (trees, chimneys, etc.)
+
+    AI will visually analyze the spatial relationship and provide detailed shading impact assessment.
+    """
+    # The project and its roof planes come back in one JOINed query, obstructions in a second.
+    # Only the columns the AI payload and its formula fallback read are fetched; the
+    # fallback runs without a session, so polygon_wkt can't be deferred to it.
+    project = (await db.scalars(
+        select(Project)
+        .options(
+            load_only(Project.id, Project.latitude, Project.longitude),
+            joinedload(Project.roof_planes).load_only(
+                RoofPlane.id, RoofPlane.name, RoofPlane.tilt_deg, RoofPlane.azimuth_deg, RoofPlane.polygon_wkt
+            ),
+            selectinload(Project.obstructions).load_only(
+                Obstruction.id, Obstruction.type, Obstruction.height_m, Obstruction.polygon_wkt
+            ),
+        )
+        .where(Project.id == project_id)
+    )).unique().one_or_none()
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    # Save uploaded geometry image temporarily
+    upload_dir = project_upload_dir(project_id)
+
+    # Random name plus the client's extension only; the client filename may hold spaces or path separators
+    ext = os.path.splitext(geometry_image.filename or "")[1].lower()
+    filename = f"geometry_{secrets.token_urlsafe(12)}{ext}"
+    file_path = os.path.join(upload_dir, filename)
+
+    # Streamed in chunks so the event loop keeps serving other requests during the copy
+    _, sha256 = await write_upload(geometry_image, file_path)
+
+    # Roof planes and obstructions for context
+    planes = project.roof_planes
+    obs = project.obstructions
+    roof_planes_data = [{
+        "id": p.id,
+        "polygon_wkt": p.polygon_wkt,
+        "name": p.name,
+        "tilt_deg": p.tilt_deg,
+        "azimuth_deg": p.azimuth_deg
+    } for p in planes]
+    obstructions_data = [{
+        "id": o.id,
+        "polygon_wkt": o.polygon_wkt,
+        "type": o.type,
+        "height_m": o.height_m
+    } for o in obs]
+    image_url = f"/storage/uploads/project_{project_id}/{filename}"
+
+    if settings.ANALYSIS_WORKER_ENABLED:
+        rec = AnalysisResult(project_id=project_id, kind="shading", status="queued", result={})
+        db.add(rec)
+        await db.commit()
+        # A Gemini round-trip takes seconds; clients poll GET /analysis/{id} for the result
+        background_tasks.add_task(
+            enqueue, "enqueue_shading_ai_vision", rec.id, file_path, sha256, image_url,
+            roof_planes_data, obstructions_data, project.latitude, project.longitude,
+        )
+        return rec
+
+    # The request waits for the result anyway, so the record is written once, finished.
+    # Close the session first so its read transaction doesn't hold a pooled connection
+    # through the AI round-trip.
+    await db.close()
+
+    # Run AI-powered shading analysis in a thread so the event loop isn't held for the round-trip
+    try:
+        result = await asyncio.to_thread(
+            run_ai_vision_shading, file_path, sha256, image_url,
+            roof_planes_data, obstructions_data, project.latitude, project.longitude,
+        )
+        status = "done"
+    except Exception as e:
+        result = {"error": str(e)}
+        status = "failed"
+
+    rec = AnalysisResult(project_id=project_id, kind="shading", status=status, result=result)
+    db.add(rec)
+    await db.commit()
+    if status == "failed":
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {result['error']}")
 
     return rec
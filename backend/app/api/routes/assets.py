@@ -1,44 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.api.deps import get_db
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, UploadFile, File, Form, Request, Response
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, lambda_stmt
+from pydantic import TypeAdapter
+from app.api.deps import get_db, get_async_db, cached_list_body, commit_or_404, async_commit_or_404, fk_violation_as_404, MAX_BULK_ITEMS, LIST_CACHE_CONTROL, list_etag, etag_matches
 from app.api.schemas import AssetCreate, AssetOut
-from app.db.models import Asset, Project
-from pathlib import Path
-import uuid
-import shutil
+from app.db.models import Asset
+from app.services.cache import invalidate_responses
+from app.services.storage import project_upload_dir, save_upload, remove_tree, remove_upload, upload_path, upload_urls
+import asyncio
+import hashlib
 
 router = APIRouter(tags=["assets"])
 
-UPLOAD_DIR = Path(__file__).parent.parent.parent.parent / "storage" / "uploads"
+_assets_json = TypeAdapter(list[AssetOut])
+
+# lambda_stmt caches the built statement by the lambda's code, so each request
+# only binds project_id instead of reconstructing and recompiling the SELECT
+def _list_assets_stmt(project_id: int):
+    return lambda_stmt(
+        lambda: select(Asset)
+        .where(Asset.project_id == project_id)
+        .order_by(Asset.id.desc())
+        .options(raiseload("*"))
+    )
 
 @router.post("/projects/{project_id}/assets/upload", response_model=AssetOut)
 async def upload_asset(
     project_id: int,
     kind: str = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload a file and create an asset record"""
-    # Validate project exists
-    if not db.get(Project, project_id):
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    # Create project-specific directory
-    project_dir = UPLOAD_DIR / f"project_{project_id}"
-    project_dir.mkdir(parents=True, exist_ok=True)
+    # Project-specific directory, created once per process
+    project_dir = project_upload_dir(project_id)
     
-    # Generate unique filename
-    file_ext = Path(file.filename).suffix
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = project_dir / unique_filename
-    
-    # Save file to disk
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Get file size
-    file_size = file_path.stat().st_size
+    # Stream and hash in one pass; the file is named by content hash, so a
+    # re-uploaded file reuses the stored copy. Nothing reads it back right away,
+    # so keep it out of the page cache.
+    filename, file_size, sha256 = await save_upload(file, project_dir, "asset", drop_cache=True)
     
     # Create asset record
     asset = Asset(
@@ -46,34 +47,80 @@ async def upload_asset(
         kind=kind,
         filename=file.filename,
         content_type=file.content_type,
-        storage_url=f"/uploads/project_{project_id}/{unique_filename}",
-        meta={"file_size": file_size, "original_filename": file.filename}
+        storage_url=f"/uploads/project_{project_id}/{filename}",
+        meta={"file_size": file_size, "sha256": sha256, "original_filename": file.filename}
     )
     db.add(asset)
-    db.commit()
-    db.refresh(asset)
+    try:
+        # The project FK doubles as the existence check
+        await async_commit_or_404(db)
+    except HTTPException:
+        # Nothing can reference files of a project that doesn't exist; dropping the
+        # whole directory also forgets it in project_upload_dir's memo
+        await asyncio.to_thread(remove_tree, project_dir)
+        raise
+    await asyncio.to_thread(invalidate_responses, f"project:{project_id}")
     
     return asset
 
 @router.post("/projects/{project_id}/assets", response_model=AssetOut)
 def create_asset(project_id: int, payload: AssetCreate, db: Session = Depends(get_db)):
-    if not db.get(Project, project_id):
-        raise HTTPException(status_code=404, detail="Project not found")
     asset = Asset(project_id=project_id, **payload.model_dump())
     db.add(asset)
-    db.commit()
-    db.refresh(asset)
+    commit_or_404(db)
+    invalidate_responses(f"project:{project_id}")
     return asset
 
+@router.post("/projects/{project_id}/assets/bulk", response_model=list[AssetOut])
+def create_assets_bulk(
+    project_id: int,
+    payload: list[AssetCreate] = Body(..., max_length=MAX_BULK_ITEMS),
+    db: Session = Depends(get_db)
+):
+    """Create many assets with one multi-row INSERT ... RETURNING and a single commit"""
+    if not payload:
+        return []
+    with fk_violation_as_404(db):
+        assets = db.scalars(
+            insert(Asset).returning(Asset),
+            [{"project_id": project_id, **item.model_dump()} for item in payload],
+        ).all()
+        db.commit()
+    invalidate_responses(f"project:{project_id}")
+    return assets
+
 @router.get("/projects/{project_id}/assets", response_model=list[AssetOut])
-def list_assets(project_id: int, db: Session = Depends(get_db)):
-    return list(db.execute(select(Asset).where(Asset.project_id == project_id).order_by(Asset.id.desc())).scalars().all())
+def list_assets(project_id: int, request: Request, db: Session = Depends(get_db)):
+    body = cached_list_body(
+        f"project:{project_id}", "assets", _assets_json,
+        lambda: db.scalars(_list_assets_stmt(project_id)).all(),
+    )
+    # Tag the body itself so a cache hit can answer 304 without touching the database
+    etag = list_etag(hashlib.blake2b(body, digest_size=8).hexdigest())
+    cache_headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+    return Response(body, media_type="application/json", headers=cache_headers)
 
 @router.delete("/assets/{asset_id}")
-def delete_asset(asset_id: int, db: Session = Depends(get_db)):
-    asset = db.get(Asset, asset_id)
-    if not asset:
+def delete_asset(asset_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Delete an asset; its file is removed after the response is sent"""
+    # Bulk DELETE ... RETURNING hands back what the cleanup needs without loading the row first
+    deleted = db.execute(
+        delete(Asset).where(Asset.id == asset_id).returning(Asset.storage_url, Asset.project_id)
+    ).one_or_none()
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Asset not found")
-    db.delete(asset)
+    storage_url, project_id = deleted
+
+    # Each upload has its own hard-linked name, so removing it never touches another
+    # asset's data. Assets stored before that could share a name; keep such a file
+    # while another asset still points at it (under either URL form)
+    path = upload_path(storage_url) if storage_url else None
+    shared = db.scalar(select(Asset.id).where(Asset.storage_url.in_(upload_urls(path))).limit(1)) if path else None
     db.commit()
-    return {"ok": True, "message": "Asset deleted"}
+    invalidate_responses(f"project:{project_id}")
+
+    if path and shared is None:
+        background_tasks.add_task(remove_upload, path)
+    return {"message": "Asset deleted successfully"}
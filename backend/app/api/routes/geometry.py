@@ -1,39 +1,104 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.api.deps import get_db
+from fastapi import APIRouter, Body, Depends, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import select, insert, lambda_stmt
+from app.api.deps import get_db, cached_list_body, commit_or_404, fk_violation_as_404, MAX_BULK_ITEMS
 from app.api.schemas import RoofPlaneCreate, RoofPlaneOut, ObstructionCreate, ObstructionOut
-from app.db.models import Project, RoofPlane, Obstruction
+from app.db.models import RoofPlane, Obstruction
+from app.services.cache import invalidate_responses
 from app.services.geometry import validate_polygon_wkt
 
 router = APIRouter(prefix="/projects/{project_id}", tags=["geometry"])
 
+_roof_planes_json = TypeAdapter(list[RoofPlaneOut])
+_obstructions_json = TypeAdapter(list[ObstructionOut])
+
+def _list_roof_planes_stmt(project_id: int):
+    return lambda_stmt(
+        lambda: select(RoofPlane)
+        .where(RoofPlane.project_id == project_id)
+        .order_by(RoofPlane.id.desc())
+        .options(raiseload("*"))
+    )
+
+def _list_obstructions_stmt(project_id: int):
+    return lambda_stmt(
+        lambda: select(Obstruction)
+        .where(Obstruction.project_id == project_id)
+        .order_by(Obstruction.id.desc())
+        .options(raiseload("*"))
+    )
+
 @router.post("/roof-planes", response_model=RoofPlaneOut)
 def create_roof_plane(project_id: int, payload: RoofPlaneCreate, db: Session = Depends(get_db)):
-    if not db.get(Project, project_id):
-        raise HTTPException(status_code=404, detail="Project not found")
     validate_polygon_wkt(payload.polygon_wkt)
     item = RoofPlane(project_id=project_id, **payload.model_dump())
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    commit_or_404(db)
+    invalidate_responses(f"project:{project_id}")
     return item
 
+@router.post("/roof-planes/bulk", response_model=list[RoofPlaneOut])
+def create_roof_planes_bulk(
+    project_id: int,
+    payload: list[RoofPlaneCreate] = Body(..., max_length=MAX_BULK_ITEMS),
+    db: Session = Depends(get_db)
+):
+    """Create many roof planes with one multi-row INSERT ... RETURNING and a single commit"""
+    if not payload:
+        return []
+    for item in payload:
+        validate_polygon_wkt(item.polygon_wkt)
+    with fk_violation_as_404(db):
+        items = db.scalars(
+            insert(RoofPlane).returning(RoofPlane),
+            [{"project_id": project_id, **item.model_dump()} for item in payload],
+        ).all()
+        db.commit()
+    invalidate_responses(f"project:{project_id}")
+    return items
+
 @router.get("/roof-planes", response_model=list[RoofPlaneOut])
 def list_roof_planes(project_id: int, db: Session = Depends(get_db)):
-    return list(db.execute(select(RoofPlane).where(RoofPlane.project_id == project_id).order_by(RoofPlane.id.desc())).scalars().all())
+    body = cached_list_body(
+        f"project:{project_id}", "roof_planes", _roof_planes_json,
+        lambda: db.scalars(_list_roof_planes_stmt(project_id)).all(),
+    )
+    return Response(body, media_type="application/json")
 
 @router.post("/obstructions", response_model=ObstructionOut)
 def create_obstruction(project_id: int, payload: ObstructionCreate, db: Session = Depends(get_db)):
-    if not db.get(Project, project_id):
-        raise HTTPException(status_code=404, detail="Project not found")
     validate_polygon_wkt(payload.polygon_wkt)
     item = Obstruction(project_id=project_id, **payload.model_dump())
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    commit_or_404(db)
+    invalidate_responses(f"project:{project_id}")
     return item
 
+@router.post("/obstructions/bulk", response_model=list[ObstructionOut])
+def create_obstructions_bulk(
+    project_id: int,
+    payload: list[ObstructionCreate] = Body(..., max_length=MAX_BULK_ITEMS),
+    db: Session = Depends(get_db)
+):
+    """Create many obstructions with one multi-row INSERT ... RETURNING and a single commit"""
+    if not payload:
+        return []
+    for item in payload:
+        validate_polygon_wkt(item.polygon_wkt)
+    with fk_violation_as_404(db):
+        items = db.scalars(
+            insert(Obstruction).returning(Obstruction),
+            [{"project_id": project_id, **item.model_dump()} for item in payload],
+        ).all()
+        db.commit()
+    invalidate_responses(f"project:{project_id}")
+    return items
+
 @router.get("/obstructions", response_model=list[ObstructionOut])
 def list_obstructions(project_id: int, db: Session = Depends(get_db)):
-    return list(db.execute(select(Obstruction).where(Obstruction.project_id == project_id).order_by(Obstruction.id.desc())).scalars().all())
+    body = cached_list_body(
+        f"project:{project_id}", "obstructions", _obstructions_json,
+        lambda: db.scalars(_list_obstructions_stmt(project_id)).all(),
+    )
+    return Response(body, media_type="application/json")
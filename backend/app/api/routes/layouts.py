@@ -1,22 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.api.deps import get_db
+from fastapi import APIRouter, Depends, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import select, lambda_stmt
+from app.api.deps import get_db, cached_list_body, commit_or_404
 from app.api.schemas import LayoutCreate, LayoutOut
-from app.db.models import Project, Layout
+from app.db.models import Layout
+from app.services.cache import invalidate_responses
 
 router = APIRouter(prefix="/projects/{project_id}/layouts", tags=["layouts"])
 
+_layouts_json = TypeAdapter(list[LayoutOut])
+
+def _list_layouts_stmt(project_id: int):
+    return lambda_stmt(
+        lambda: select(Layout)
+        .where(Layout.project_id == project_id)
+        .order_by(Layout.id.desc())
+        .options(raiseload("*"))
+    )
+
 @router.post("", response_model=LayoutOut)
 def create_layout(project_id: int, payload: LayoutCreate, db: Session = Depends(get_db)):
-    if not db.get(Project, project_id):
-        raise HTTPException(status_code=404, detail="Project not found")
     item = Layout(project_id=project_id, name=payload.name, data=payload.data)
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    commit_or_404(db)
+    invalidate_responses(f"project:{project_id}")
     return item
 
 @router.get("", response_model=list[LayoutOut])
 def list_layouts(project_id: int, db: Session = Depends(get_db)):
-    return list(db.execute(select(Layout).where(Layout.project_id == project_id).order_by(Layout.id.desc())).scalars().all())
+    body = cached_list_body(
+        f"project:{project_id}", "layouts", _layouts_json,
+        lambda: db.scalars(_list_layouts_stmt(project_id)).all(),
+    )
+    return Response(body, media_type="application/json")
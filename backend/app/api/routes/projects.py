@@ -1,26 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
-from app.api.deps import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Query, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, lambda_stmt
+from pydantic import TypeAdapter
+from app.api.deps import get_db, get_async_db, cached_list_body, etag_matches
 from app.api.schemas import ProjectCreate, ProjectOut, ProjectListResponse, PaginationMeta
-from app.db.models import Project
-import os
-import uuid
+from app.db.models import Project, Report
+from app.services.cache import invalidate_responses
+from app.services.storage import project_upload_dir, project_upload_path, save_upload, remove_file, remove_tree
 from pathlib import Path
+import asyncio
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+_project_list_json = TypeAdapter(ProjectListResponse)
+
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 @router.post("", response_model=ProjectOut)
 def create_project(payload: ProjectCreate, db: Session = Depends(get_db)):
-    project = Project(name=payload.name, address=payload.address)
+    project = Project(**payload.model_dump())
     db.add(project)
     db.commit()
-    db.refresh(project)
+    invalidate_responses("projects")
     return project
 
 @router.get("", response_model=ProjectListResponse)
 def list_projects(
-    page: int = Query(1, ge=1, description="Page number (starting from 1)"),
+    page: int | None = Query(None, ge=1, description="Page number (starting from 1); returns totals but slows down on deep pages"),
+    cursor: int | None = Query(None, description="Return projects older than this id (next_cursor of the previous page)"),
     limit: int = Query(20, ge=1, le=100, description="Items per page (max 100)"),
     search: str = Query("", description="Search by project name or address"),
     db: Session = Depends(get_db)
@@ -28,38 +37,78 @@ def list_projects(
     """
     List projects with pagination and search support.
     Returns paginated data with metadata.
+    Without page, uses keyset pagination on id: follow next_cursor for the next page.
+    Pass page for numbered pages with total/total_pages (OFFSET-based).
     """
-    # Calculate offset
-    offset = (page - 1) * limit
-
-    # Build base query
-    query = select(Project).order_by(Project.id.desc())
-
-    # Add search filter if search term is provided
+    if page is None:
+        key = f"cursor:{cursor}:{limit}:{search.strip()}"
+        load = lambda: _load_project_cursor_page(cursor, limit, search, db)
+    else:
+        key = f"{page}:{limit}:{search.strip()}"
+        load = lambda: _load_project_page(page, limit, search, db)
+    body = cached_list_body("projects", key, _project_list_json, load)
+    return Response(body, media_type="application/json")
+
+def _filter_projects(stmt, search: str):
+    # Optional criteria are appended as extra lambdas; each combination is cached
+    # once and the search term is bound as a parameter
     if search.strip():
         search_term = f"%{search.strip()}%"
-        query = query.where(
+        stmt += lambda s: s.where(
             (Project.name.ilike(search_term)) |
             (Project.address.ilike(search_term))
         )
+    return stmt
+
+def _load_project_cursor_page(cursor: int | None, limit: int, search: str, db: Session) -> ProjectListResponse:
+    # Seeks straight to the cursor on the primary key index, so every page costs the same
+    fetch = limit + 1
+    query = _filter_projects(
+        lambda_stmt(lambda: select(Project).order_by(Project.id.desc()).limit(fetch).options(raiseload("*"))),
+        search,
+    )
+    if cursor is not None:
+        query += lambda s: s.where(Project.id < cursor)
 
-    # Get total count with search filter
-    count_query = select(func.count(Project.id))
-    if search.strip():
-        search_term = f"%{search.strip()}%"
-        count_query = count_query.where(
-            (Project.name.ilike(search_term)) |
-            (Project.address.ilike(search_term))
+    projects = list(db.scalars(query).all())
+    has_next = len(projects) > limit
+    projects = projects[:limit]
+
+    return ProjectListResponse(
+        data=projects,
+        pagination=PaginationMeta(
+            limit=limit,
+            has_next=has_next,
+            has_prev=cursor is not None,
+            next_cursor=projects[-1].id if has_next else None,
         )
+    )
 
-    total_count = db.execute(count_query).scalar() or 0
+def _load_project_page(page: int, limit: int, search: str, db: Session) -> ProjectListResponse:
+    # Calculate offset
+    offset = (page - 1) * limit
 
-    # Get paginated projects
-    projects = list(
-        db.execute(
-            query.offset(offset).limit(limit)
-        ).scalars().all()
+    # Total rides along on every row as a window aggregate, so one query serves both
+    query = _filter_projects(
+        lambda_stmt(
+            lambda: select(Project, func.count().over().label("total"))
+            .order_by(Project.id.desc())
+            .options(raiseload("*"))
+        ),
+        search,
     )
+    query += lambda s: s.offset(offset).limit(limit)
+
+    rows = db.execute(query).all()
+    projects = [row[0] for row in rows]
+    if rows:
+        total_count = rows[0].total
+    elif offset:
+        # Page past the end returns no rows to read the total from
+        count_query = _filter_projects(lambda_stmt(lambda: select(func.count(Project.id))), search)
+        total_count = db.scalar(count_query) or 0
+    else:
+        total_count = 0
 
     # Calculate pagination metadata
     total_pages = (total_count + limit - 1) // limit if total_count > 0 else 1
@@ -84,23 +133,32 @@ def get_project(project_id: int, db: Session = Depends(get_db)):
     return project
 
 @router.delete("/{project_id}")
-def delete_project(project_id: int, db: Session = Depends(get_db)):
-    """Delete a project by ID"""
+def delete_project(project_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Delete a project by ID; its uploads and report PDFs are removed after the response is sent"""
     project = db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    report_urls = db.scalars(
+        select(Report.storage_url).where(Report.project_id == project_id, Report.storage_url.is_not(None))
+    ).all()
     db.delete(project)
     db.commit()
+    invalidate_responses("projects", f"project:{project_id}")
+
+    # One rmtree for the whole upload dir instead of unlinking its files one by one
+    background_tasks.add_task(remove_tree, project_upload_path(project_id))
+    for url in report_urls:
+        background_tasks.add_task(remove_file, url.replace('file://', ''))
     return {"ok": True, "message": f"Project {project_id} deleted successfully"}
 
 @router.post("/{project_id}/upload-image")
 async def upload_geometry_image(
     project_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload an image for geometry editing"""
-    project = db.get(Project, project_id)
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -109,38 +167,37 @@ async def upload_geometry_image(
         raise HTTPException(status_code=400, detail="File must be an image")
 
     # Create upload directory
-    upload_dir = Path("storage/uploads") / f"project_{project_id}"
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    upload_dir = project_upload_dir(project_id)
 
-    # Generate unique filename
-    file_ext = os.path.splitext(file.filename)[1] if file.filename else '.png'
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = upload_dir / unique_filename
-
-    # Save file
-    contents = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    # Stream and hash in one pass; re-uploading the same image reuses the stored copy
+    filename, _, _ = await save_upload(file, upload_dir, "image", drop_cache=True)
 
     # Update project with image URL
-    image_url = f"/projects/{project_id}/image/{unique_filename}"
+    image_url = f"/projects/{project_id}/image/{filename}"
     project.uploaded_image_url = image_url
     project.geometry_view_mode = "uploaded"
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await asyncio.to_thread(invalidate_responses, "projects")
 
     return {"ok": True, "image_url": image_url}
 
 @router.get("/{project_id}/image/{filename}")
-async def get_geometry_image(project_id: int, filename: str):
+async def get_geometry_image(project_id: int, filename: str, request: Request):
     """Serve uploaded geometry image"""
-    from fastapi.responses import FileResponse
-
-    file_path = Path("storage/uploads") / f"project_{project_id}" / filename
-    if not file_path.exists():
+    file_path = Path(project_upload_path(project_id)) / filename
+    # One stat serves both the existence check and FileResponse's
+    # Content-Length/Last-Modified headers
+    try:
+        stat_result = file_path.stat()
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    return FileResponse(file_path)
+    # Image names are never reused for other content, so a URL always serves the same bytes
+    etag = f'"{file_path.stem}"'
+    cache_headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+    return FileResponse(file_path, stat_result=stat_result, headers=cache_headers)
 
 @router.patch("/{project_id}/view-mode")
 def update_view_mode(
@@ -158,5 +215,6 @@ def update_view_mode(
 
     project.geometry_view_mode = view_mode
     db.commit()
+    invalidate_responses("projects")
 
     return {"ok": True, "view_mode": view_mode}
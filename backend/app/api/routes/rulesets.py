@@ -1,20 +1,29 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.api.deps import get_db
+from sqlalchemy import select, lambda_stmt
+from app.api.deps import get_db, cached_list_body
 from app.api.schemas import RuleSetCreate, RuleSetOut
 from app.db.models import RuleSet
+from app.services.cache import invalidate_responses
 
 router = APIRouter(prefix="/rulesets", tags=["rulesets"])
 
+_rulesets_json = TypeAdapter(list[RuleSetOut])
+_list_rulesets_stmt = lambda_stmt(lambda: select(RuleSet).order_by(RuleSet.id.desc()))
+
 @router.post("", response_model=RuleSetOut)
 def create_ruleset(payload: RuleSetCreate, db: Session = Depends(get_db)):
     item = RuleSet(**payload.model_dump())
     db.add(item)
     db.commit()
-    db.refresh(item)
+    invalidate_responses("rulesets")
     return item
 
 @router.get("", response_model=list[RuleSetOut])
 def list_rulesets(db: Session = Depends(get_db)):
-    return list(db.execute(select(RuleSet).order_by(RuleSet.id.desc())).scalars().all())
+    body = cached_list_body(
+        "rulesets", "all", _rulesets_json,
+        lambda: db.scalars(_list_rulesets_stmt).all(),
+    )
+    return Response(body, media_type="application/json")
@@ -1,10 +1,13 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Any
 from datetime import datetime
+from enum import Enum
 
 class ProjectCreate(BaseModel):
     name: str
     address: str | None = None
+    latitude: float | None = Field(None, ge=-90, le=90)
+    longitude: float | None = Field(None, ge=-180, le=180)
 
 class ProjectOut(BaseModel):
     model_config = ConfigDict(from_attributes=True, protected_namespaces=())
@@ -15,15 +18,18 @@ class ProjectOut(BaseModel):
     status: str
     uploaded_image_url: str | None = None
     geometry_view_mode: str | None = "uploaded"
+    latitude: float | None = None
+    longitude: float | None = None
     created_at: datetime
 
 class PaginationMeta(BaseModel):
-    total: int
-    page: int
+    total: int | None = None  # Page-number mode only
+    page: int | None = None
     limit: int
-    total_pages: int
+    total_pages: int | None = None
     has_next: bool
     has_prev: bool
+    next_cursor: int | None = None  # Cursor mode: pass back as cursor for the next page
 
 class ProjectListResponse(BaseModel):
     data: list[ProjectOut]
@@ -59,6 +65,7 @@ class RoofPlaneOut(RoofPlaneCreate):
 
     id: int
     project_id: int
+    area_m2: float | None = None
     created_at: datetime
 
 class ObstructionCreate(BaseModel):
@@ -95,6 +102,12 @@ class RuleSetOut(RuleSetCreate):
     id: int
     created_at: datetime
 
+class AnalysisKind(str, Enum):
+    shading = "shading"
+    compliance = "compliance"
+    roof_risk = "roof_risk"
+    electrical = "electrical"
+
 class AnalysisOut(BaseModel):
     model_config = ConfigDict(from_attributes=True, protected_namespaces=())
 
@@ -106,6 +119,18 @@ class AnalysisOut(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class AnalysisPage(BaseModel):
+    data: list[AnalysisOut]
+    next_before_id: int | None = None
+
+class HybridReplayIn(BaseModel):
+    math_scores: list[float]
+    ai_scores: list[float]
+
+class HybridReplayOut(BaseModel):
+    hybrid_scores: list[float]
+    confidence: list[str]
+
 class ReportOut(BaseModel):
     model_config = ConfigDict(from_attributes=True, protected_namespaces=())
 
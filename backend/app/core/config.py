@@ -5,6 +5,13 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/0"
     APP_ENV: str = "dev"
     GEMINI_API_KEY: str = ""  # Google Gemini API key for roof image analysis
+    ANALYSIS_WORKER_ENABLED: bool = False  # Queue analyses and reports to the Celery worker instead of running them in-process
+    ANALYSIS_CACHE_TTL: int = 3600  # Seconds to cache shading/compliance results in Redis (0 disables)
+    RESPONSE_CACHE_TTL: int = 60  # Seconds to cache list endpoint responses in Redis (0 disables)
+    DB_POOL_SIZE: int = 5  # Persistent connections per engine (each process has a sync and an async engine)
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed under bursts, closed when returned
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    SERVE_STATIC_FILES: bool = True  # Mount /uploads, /storage and /reports_files; turn off when a reverse proxy serves them
 
     class Config:
         env_file = ".env"
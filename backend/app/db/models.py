@@ -2,27 +2,62 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.types import DateTime, Integer, String, Text, Float, JSON
 from sqlalchemy.sql import func
-from sqlalchemy import ForeignKey
+from sqlalchemy import Computed, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 
 from app.db.base import Base
 
+# Binary JSON on Postgres (parsed once on write, GIN-indexable); plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class Project(Base):
     __tablename__ = "projects"
+    # Trigram indexes back the unanchored ILIKE search in list_projects (needs pg_trgm)
+    __table_args__ = (
+        Index(
+            "ix_projects_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_projects_address_trgm", "address",
+            postgresql_using="gin", postgresql_ops={"address": "gin_trgm_ops"},
+        ),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     address: Mapped[str | None] = mapped_column(Text, nullable=True)
     status: Mapped[str] = mapped_column(String(50), nullable=False, default="new")
     uploaded_image_url: Mapped[str | None] = mapped_column(Text, nullable=True)
     geometry_view_mode: Mapped[str | None] = mapped_column(String(20), nullable=True, default="uploaded")
+    # Site location for sun-path analysis; shading falls back to a default site when unset
+    latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    # Load explicitly with selectinload; lazy="raise" keeps async sessions from lazy-loading.
+    # passive_deletes leaves child rows to the ON DELETE CASCADE foreign keys.
+    assets: Mapped[list[Asset]] = relationship(
+        back_populates="project", lazy="raise", passive_deletes=True
+    )
+    analysis_results: Mapped[list[AnalysisResult]] = relationship(
+        back_populates="project", lazy="raise", passive_deletes=True
+    )
+    roof_planes: Mapped[list[RoofPlane]] = relationship(
+        back_populates="project", lazy="raise", passive_deletes=True
+    )
+    obstructions: Mapped[list[Obstruction]] = relationship(
+        back_populates="project", lazy="raise", passive_deletes=True
+    )
+
 
 class Asset(Base):
     __tablename__ = "assets"
+    __table_args__ = (Index("ix_assets_project_id_id", "project_id", text("id DESC")),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
@@ -31,12 +66,15 @@ class Asset(Base):
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
     content_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
     storage_url: Mapped[str] = mapped_column(Text, nullable=False)
-    meta: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    meta: Mapped[dict] = mapped_column(JSONType, nullable=False, default=dict)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    project: Mapped[Project] = relationship(back_populates="assets", lazy="raise")
+
 
 class RoofPlane(Base):
     __tablename__ = "roof_planes"
+    __table_args__ = (Index("ix_roof_planes_project_id_id", "project_id", text("id DESC")),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
@@ -44,30 +82,44 @@ class RoofPlane(Base):
     name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     tilt_deg: Mapped[float | None] = mapped_column(Float, nullable=True)
     azimuth_deg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Migrations add a GIST-indexed `polygon` geometry generated from this column;
+    # it is left unmapped so ORM loads never fetch it
     polygon_wkt: Mapped[str] = mapped_column(Text, nullable=False)
+    # Generated by Postgres from polygon_wkt on write, so compliance skips the WKT parse
+    area_m2: Mapped[float | None] = mapped_column(
+        Float, Computed("ST_Area(ST_GeomFromText(polygon_wkt))", persisted=True), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    project: Mapped[Project] = relationship(back_populates="roof_planes", lazy="raise")
+
 
 class Obstruction(Base):
     __tablename__ = "obstructions"
+    __table_args__ = (Index("ix_obstructions_project_id_id", "project_id", text("id DESC")),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
     )
     type: Mapped[str] = mapped_column(String(50), nullable=False)
+    # Migrations add a GIST-indexed `polygon` geometry generated from this column;
+    # it is left unmapped so ORM loads never fetch it
     polygon_wkt: Mapped[str] = mapped_column(Text, nullable=False)
     height_m: Mapped[float | None] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    project: Mapped[Project] = relationship(back_populates="obstructions", lazy="raise")
+
 
 class Layout(Base):
     __tablename__ = "layouts"
+    __table_args__ = (Index("ix_layouts_project_id_id", "project_id", text("id DESC")),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
     )
     name: Mapped[str] = mapped_column(String(255), nullable=False, default="Layout v1")
-    data: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    data: Mapped[dict] = mapped_column(JSONType, nullable=False, default=dict)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -76,19 +128,20 @@ class RuleSet(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     jurisdiction: Mapped[str] = mapped_column(String(255), nullable=False)
     version: Mapped[str] = mapped_column(String(50), nullable=False, default="v1")
-    rules: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    rules: Mapped[dict] = mapped_column(JSONType, nullable=False, default=dict)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (Index("ix_reports_project_id_id", "project_id", text("id DESC")),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
     )
     status: Mapped[str] = mapped_column(String(50), nullable=False, default="queued")
     storage_url: Mapped[str | None] = mapped_column(Text, nullable=True)
-    meta: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    meta: Mapped[dict] = mapped_column(JSONType, nullable=False, default=dict)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -97,14 +150,27 @@ class Report(Base):
 
 class AnalysisResult(Base):
     __tablename__ = "analysis_results"
+    # Fetch updated_at via RETURNING on UPDATE so async sessions never lazy-load it
+    __mapper_args__ = {"eager_defaults": True}
+    # Serves "latest runs for a project" as a backward index scan
+    __table_args__ = (
+        Index("ix_analysis_results_project_id_id", "project_id", text("id DESC")),
+        Index(
+            "ix_analysis_results_result_gin", "result",
+            postgresql_using="gin", postgresql_ops={"result": "jsonb_path_ops"},
+        ),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     project_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
     )
     kind: Mapped[str] = mapped_column(String(50), nullable=False)
     status: Mapped[str] = mapped_column(String(50), nullable=False, default="queued")
-    result: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    result: Mapped[dict] = mapped_column(JSONType, nullable=False, default=dict)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+    project: Mapped[Project] = relationship(back_populates="analysis_results", lazy="raise")
@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.core.config import settings
+import orjson
 
 # Convert postgresql:// to postgresql+psycopg:// for psycopg3 driver
 database_url = settings.DATABASE_URL
@@ -9,5 +11,31 @@ if database_url.startswith("postgresql://"):
 elif database_url.startswith("postgres://"):
     database_url = database_url.replace("postgres://", "postgresql+psycopg://", 1)
 
-engine = create_engine(database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+def _json_serializer(obj) -> str:
+    # Analysis results can carry numpy scalars from the scoring code
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+
+# JSON/JSONB columns (analysis results above all) are encoded and parsed with orjson
+# instead of the stdlib json module; psycopg picks up the deserializer for jsonb too
+JSON_CODEC = {"json_serializer": _json_serializer, "json_deserializer": orjson.loads}
+
+# LIFO checkout keeps reusing the most recently returned connections, whose server-side
+# caches are warm; surplus ones sit idle. Sizes apply per engine and every process
+# (API or worker) builds two engines, so keep them small against max_connections.
+POOL_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_use_lifo": True,
+}
+
+engine = create_engine(database_url, **POOL_OPTIONS, **JSON_CODEC)
+# Keep attributes loaded after commit: inserts already fetch id/created_at via RETURNING,
+# so handlers can return the new row without a refresh SELECT
+SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+
+# psycopg3 speaks asyncio natively, so the same URL drives the async engine.
+# Objects stay loaded after commit because async sessions cannot lazy-load.
+async_engine = create_async_engine(database_url, **POOL_OPTIONS, **JSON_CODEC)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
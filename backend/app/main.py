@@ -1,12 +1,16 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
 from app.api.routes import api_router
-from app.api.deps import get_db
+from app.core.config import settings
+from app.services.storage import UPLOADS_ROOT
+from collections import Counter
 from pathlib import Path
 
-app = FastAPI(title="Solar AI Platform API", version="0.2.0")
+# orjson encodes the analysis result blobs much faster than the stdlib encoder
+app = FastAPI(title="Solar AI Platform API", version="0.2.0", default_response_class=ORJSONResponse)
 
 # CORS origins - supports both development and production
 import os
@@ -20,58 +24,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for uploads
-UPLOAD_DIR = Path(__file__).parent.parent / "storage" / "uploads"
+# Uploaded files (the same absolute dir the upload handlers write to)
+UPLOAD_DIR = Path(UPLOADS_ROOT)
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
-# Mount storage directory (for compatibility with /storage/uploads paths)
+# Storage root (served as /storage for compatibility with /storage/uploads paths)
 STORAGE_DIR = Path(__file__).parent.parent / "storage"
 STORAGE_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/storage", StaticFiles(directory=str(STORAGE_DIR)), name="storage")
 
-# Mount static files for reports
+# Generated report PDFs
 REPORTS_DIR = Path(__file__).parent.parent / "reports_out"
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/reports_files", StaticFiles(directory=str(REPORTS_DIR)), name="reports")
 
-@app.delete("/analysis/{analysis_id}")
-async def delete_analysis_endpoint(analysis_id: int, db: Session = Depends(get_db)):
-    """Delete an analysis result"""
-    from app.db.models import AnalysisResult
-    analysis = db.get(AnalysisResult, analysis_id)
-    if not analysis:
-        raise HTTPException(status_code=404, detail="Analysis not found")
-
-    db.delete(analysis)
-    db.commit()
-    return {"message": "Analysis deleted successfully"}
-
-@app.delete("/assets/{asset_id}")
-async def delete_asset_endpoint(asset_id: int, db: Session = Depends(get_db)):
-    """Delete an asset"""
-    from app.db.models import Asset
-    import os
-
-    asset = db.get(Asset, asset_id)
-    if not asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
-
-    # Try to delete the physical file
-    if asset.storage_url:
-        file_path = asset.storage_url.replace('/storage/', 'storage/')
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception:
-                pass  # Continue even if file deletion fails
-
-    db.delete(asset)
-    db.commit()
-    return {"message": "Asset deleted successfully"}
+# Behind a reverse proxy the files are sent straight from disk and never reach the event loop
+if settings.SERVE_STATIC_FILES:
+    app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+    app.mount("/storage", StaticFiles(directory=str(STORAGE_DIR)), name="storage")
+    app.mount("/reports_files", StaticFiles(directory=str(REPORTS_DIR)), name="reports")
 
 app.include_router(api_router)
 
+def check_unique_routes(app: FastAPI) -> None:
+    """
+    A (method, path) registered twice is silently shadowed by the first handler; fail at startup instead.
+    Raises RuntimeError rather than asserting, since python -O strips asserts.
+    """
+    route_keys = Counter(
+        (method, route.path) for route in app.routes if isinstance(route, APIRoute) for method in route.methods
+    )
+    duplicates = sorted(key for key, count in route_keys.items() if count > 1)
+    if duplicates:
+        raise RuntimeError(f"Duplicate API routes registered: {duplicates}")
+
+check_unique_routes(app)
+
 @app.get("/health")
 def health():
     return {"ok": True}
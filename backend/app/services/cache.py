@@ -0,0 +1,174 @@
+"""
+Analysis Result Cache
+Memoizes pure analysis functions in Redis, keyed by a hash of their inputs.
+Redis being unavailable only costs a cache miss; the analysis still runs, and
+Redis is skipped for a while instead of timing out on every call.
+"""
+import functools
+import hashlib
+import time
+
+import orjson
+import redis
+
+from app.core.config import settings
+
+_client = None
+
+# After a Redis error, skip Redis for this long instead of paying the socket timeouts on every call
+REDIS_RETRY_SECONDS = 30.0
+_redis_ok = True
+_redis_last_failure = 0.0
+# Namespaces written while Redis was skipped; dropped before Redis is used again
+_missed_invalidations: set[str] = set()
+
+
+def _redis():
+    global _client
+    if _client is None:
+        # Short timeouts: a slow or missing Redis must not stall an analysis
+        _client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2)
+    return _client
+
+
+def _call(op):
+    """
+    op(client), or None while Redis is known down or when it raises a Redis error.
+    Invalidations missed during an outage are replayed first, so a cache entry
+    written before the outage is never served after a write that happened during it.
+    """
+    global _redis_ok, _redis_last_failure
+    if not _redis_ok and time.monotonic() - _redis_last_failure < REDIS_RETRY_SECONDS:
+        return None  # Redis known down; behave as a miss
+
+    try:
+        if _missed_invalidations:
+            missed = set(_missed_invalidations)
+            _drop_responses(_redis(), missed)
+            _missed_invalidations.difference_update(missed)
+        result = op(_redis())
+    except redis.RedisError as e:
+        if _redis_ok:
+            print(f"⚠️  Redis unreachable, skipping the cache for {REDIS_RETRY_SECONDS:.0f}s: {e}")
+        _redis_ok = False
+        _redis_last_failure = time.monotonic()
+        return None
+
+    if not _redis_ok:
+        print("Redis reachable again")
+        _redis_ok = True
+    return result
+
+
+def redis_memoize(prefix: str, version: int = 1, exclude: tuple[str, ...] = (), cache_if=None):
+    """
+    Cache a function's JSON result under prefix + a blake2b hash of its arguments.
+
+    Bump version whenever the function's output changes for the same input.
+    Keyword arguments named in exclude are left out of the key (e.g. a file path
+    when a content hash is passed too). With cache_if, only results for which
+    cache_if(result) is true are stored.
+    Calls with arguments orjson can't serialize are not cached.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            ttl = settings.ANALYSIS_CACHE_TTL
+            if ttl <= 0:
+                return fn(*args, **kwargs)
+
+            try:
+                key_kwargs = {k: v for k, v in kwargs.items() if k not in exclude}
+                payload = orjson.dumps([version, args, key_kwargs], option=orjson.OPT_SORT_KEYS)
+            except TypeError:
+                return fn(*args, **kwargs)
+            key = f"analysis:{prefix}:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
+            cached = _call(lambda r: r.get(key))
+            if cached is not None:
+                return orjson.loads(cached)
+
+            result = fn(*args, **kwargs)
+            if cache_if is not None and not cache_if(result):
+                return result
+            try:
+                value = orjson.dumps(result)
+            except TypeError:
+                return result
+            _call(lambda r: r.setex(key, ttl, value))
+            return result
+        return wrapper
+    return decorator
+
+
+# List endpoint responses are cached as fields of one Redis hash per namespace
+# ("projects", "project:{id}", "rulesets"), so a write drops them all with a single DEL.
+# Each namespace also has a generation counter that writes bump: a body loaded before
+# a write is only stored if the generation is still the one read before the load,
+# so a read racing a write cannot put the old list back into the cache.
+
+# Generation counters only have to outlive a list load that is still in flight
+GENERATION_TTL_SECONDS = 86400
+
+# Store the body only if the namespace generation still matches (missing counts as 0)
+_CACHE_IF_CURRENT = """
+if (redis.call('GET', KEYS[1]) or '0') == ARGV[1] then
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+end
+"""
+
+
+def _response_hash(namespace: str) -> str:
+    return f"responses:{namespace}"
+
+
+def _generation_key(namespace: str) -> str:
+    return f"responses:{namespace}:generation"
+
+
+def get_cached_response(namespace: str, key: str) -> tuple[bytes | None, bytes | None]:
+    """
+    Cached JSON body for key in namespace plus the namespace generation, in one round trip.
+    The body is None on a miss; both are None when caching is off or Redis fails.
+    Pass the generation to cache_response after loading the body on a miss.
+    """
+    if settings.RESPONSE_CACHE_TTL <= 0:
+        return None, None
+    fetched = _call(lambda r: (
+        r.pipeline(transaction=False)
+        .get(_generation_key(namespace))
+        .hget(_response_hash(namespace), key)
+        .execute()
+    ))
+    if fetched is None:
+        return None, None
+    generation, body = fetched
+    return body, generation or b"0"
+
+
+def cache_response(namespace: str, key: str, body: bytes, generation: bytes | None) -> None:
+    """Store body unless the namespace was invalidated since get_cached_response returned generation"""
+    ttl = settings.RESPONSE_CACHE_TTL
+    if ttl <= 0 or generation is None:
+        return
+    _call(lambda r: r.eval(
+        _CACHE_IF_CURRENT, 2, _generation_key(namespace), _response_hash(namespace),
+        generation, key, body, ttl,
+    ))
+
+
+def invalidate_responses(*namespaces: str) -> None:
+    """Drop every cached response in the given namespaces; call after committing a write"""
+    if settings.RESPONSE_CACHE_TTL <= 0:
+        return
+    if _call(lambda r: _drop_responses(r, namespaces)) is None:
+        _missed_invalidations.update(namespaces)
+
+
+def _drop_responses(client, namespaces) -> list:
+    pipe = client.pipeline(transaction=False)
+    for namespace in namespaces:
+        pipe.incr(_generation_key(namespace)).expire(_generation_key(namespace), GENERATION_TTL_SECONDS)
+    pipe.delete(*(_response_hash(namespace) for namespace in namespaces))
+    return pipe.execute()
@@ -10,10 +10,15 @@ Features:
 - Clear pass/warning/fail status
 - Actionable fix suggestions
 """
+from collections import Counter, defaultdict
+from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
-from shapely import wkt
 from shapely.geometry import Polygon
 import math
+import numpy as np
+import shapely
+
+from app.services.cache import redis_memoize
 
 
 # Default panel dimensions (in meters)
@@ -28,6 +33,16 @@ PACKING_FACTOR = 0.75  # 75% efficient packing
 class ComplianceRuleset:
     """Default compliance ruleset with configurable thresholds"""
 
+    __slots__ = (
+        "edge_setback_m",
+        "max_roof_coverage_ratio",
+        "fire_pathway_min_width_m",
+        "fire_pathway_max_coverage_ratio",
+        "panel_width_m",
+        "panel_height_m",
+        "panel_area_m2",
+    )
+
     def __init__(self):
         # Edge setback requirements
         self.edge_setback_m = 0.9  # meters from roof edge
@@ -45,17 +60,52 @@ class ComplianceRuleset:
         self.panel_area_m2 = DEFAULT_PANEL_AREA
 
 
+# Shared by every run that doesn't pass its own ruleset; treat it as read-only
+_DEFAULT_RULESET = ComplianceRuleset()
+
+
+# Rule metadata and message templates, in the order violations are reported;
+# check_layouts_compliance fills the templates from each failing layout's values.
+# (rule_id, rule_name, severity, message, fix_suggestion)
+COMPLIANCE_RULES = (
+    (
+        "EDGE_SETBACK", "Edge Setback Requirement", "high",
+        "Panels are {offset_from_edge}m from edge (minimum: {edge_setback_m}m)",
+        "Increase offset_from_edge to {edge_setback_m}m or greater",
+    ),
+    (
+        "ROOF_COVERAGE", "Maximum Roof Coverage", "high",
+        "Roof coverage is {coverage_pct:.1f}% (maximum: {max_coverage_pct:.0f}%)",
+        "Reduce panel count to {max_panels_for_coverage} or fewer panels",
+    ),
+    (
+        "FIRE_PATHWAY_COVERAGE", "Fire Pathway Clearance", "medium",
+        "High roof coverage ({coverage_pct:.1f}%) may restrict fire access pathways",
+        "Reduce panel coverage or ensure clear pathways for emergency access",
+    ),
+    (
+        "FIRE_PATHWAY_WIDTH", "Fire Pathway Width", "medium",
+        "Edge clearance ({offset_from_edge}m) may not provide adequate fire pathway",
+        "Increase edge offset to {fire_pathway_min_width_m}m for fire safety",
+    ),
+    (
+        "PANEL_FIT", "Physical Panel Fit", "high",
+        "{panel_count} panels cannot physically fit on {roof_area:.1f}m² roof (max ~{max_panels} panels)",
+        "Reduce panel count to {max_panels} or fewer, or use a larger roof plane",
+    ),
+)
+
+
+@dataclass(slots=True, frozen=True)
 class ComplianceViolation:
     """Represents a single compliance rule violation"""
 
-    def __init__(self, rule_id: str, rule_name: str, severity: str,
-                 message: str, fix_suggestion: str, affected_plane: Optional[str] = None):
-        self.rule_id = rule_id
-        self.rule_name = rule_name
-        self.severity = severity  # "high", "medium", "low"
-        self.message = message
-        self.fix_suggestion = fix_suggestion
-        self.affected_plane = affected_plane
+    rule_id: str
+    rule_name: str
+    severity: str  # "high", "medium", "low"
+    message: str
+    fix_suggestion: str
+    affected_plane: Optional[str] = None
 
     def to_dict(self) -> Dict:
         return {
@@ -68,6 +118,7 @@ class ComplianceViolation:
         }
 
 
+@redis_memoize("compliance")
 def run_compliance_analysis(roof_planes: List[Dict], layouts: List[Dict],
                            ruleset: Optional[ComplianceRuleset] = None) -> Dict:
     """
@@ -82,56 +133,54 @@ def run_compliance_analysis(roof_planes: List[Dict], layouts: List[Dict],
         Dictionary with compliance results including status, score, and violations
     """
     if ruleset is None:
-        ruleset = ComplianceRuleset()
+        ruleset = _DEFAULT_RULESET
 
     violations: List[ComplianceViolation] = []
 
     # Create mapping of roof planes to layouts
-    plane_layouts = {}
+    plane_layouts = defaultdict(list)
     for layout in layouts:
-        plane_id = layout.get("roof_plane_id")
-        if plane_id not in plane_layouts:
-            plane_layouts[plane_id] = []
-        plane_layouts[plane_id].append(layout)
+        plane_layouts[layout.get("roof_plane_id")].append(layout)
 
-    # Check each roof plane with its layouts
+    # Planes that have both a polygon and at least one layout; the same pass counts
+    # the planes with layouts for the summary. .get() keeps misses out of the defaultdict.
+    planned = []
+    checked_planes = 0
     for plane in roof_planes:
         plane_id = plane.get("id")
-        plane_name = plane.get("name", f"Roof Plane {plane_id}")
-        plane_polygon_wkt = plane.get("polygon_wkt")
-
-        if not plane_polygon_wkt:
-            continue
-
-        # Get layouts for this plane
-        plane_layout_list = plane_layouts.get(plane_id, [])
-
+        plane_layout_list = plane_layouts.get(plane_id)
         if not plane_layout_list:
-            # No layout on this plane - skip
             continue
+        checked_planes += 1
+        plane_polygon_wkt = plane.get("polygon_wkt")
+        if plane_polygon_wkt:
+            planned.append((plane.get("name", f"Roof Plane {plane_id}"), plane_layout_list,
+                             plane_polygon_wkt, plane.get("area_m2")))
+
+    # Planes loaded from the database carry the area Postgres generated on write; only
+    # the rest have their WKT parsed and measured, in one vectorized GEOS call.
+    # Unparseable WKT comes back as None (area NaN) and that plane is skipped
+    roof_areas = [area_m2 for _, _, _, area_m2 in planned]
+    unmeasured = [i for i, area_m2 in enumerate(roof_areas) if area_m2 is None]
+    if unmeasured:
+        parsed_areas = shapely.area(shapely.from_wkt(
+            np.array([planned[i][2] for i in unmeasured], dtype=object), on_invalid="ignore"
+        ))
+        for i, roof_area in zip(unmeasured, parsed_areas.tolist()):
+            roof_areas[i] = roof_area
 
-        # Parse roof geometry
-        try:
-            roof_geom = wkt.loads(plane_polygon_wkt)
-            roof_area = roof_geom.area
-        except Exception:
+    # Pair each layout with its roof plane's area; the rules then run over all pairs at once
+    checks: List[Tuple[str, Dict, float]] = []
+    for (plane_name, plane_layout_list, _, _), roof_area in zip(planned, roof_areas):
+        if math.isnan(roof_area):
             continue
-
-        # Analyze each layout on this plane
         for layout in plane_layout_list:
-            layout_violations = check_layout_compliance(
-                plane, layout, roof_area, ruleset, plane_name
-            )
-            violations.extend(layout_violations)
+            checks.append((plane_name, layout, roof_area))
 
-    # Calculate compliance score
-    score = calculate_compliance_score(violations)
+    violations.extend(check_layouts_compliance(checks, ruleset))
 
-    # Determine overall status
-    status = determine_compliance_status(violations)
-
-    # Check if we actually checked any layouts
-    checked_planes = len([p for p in roof_planes if p.get("id") in plane_layouts])
+    # Score, status and per-severity counts in one pass over the violations
+    score, status, severity_counts = summarize_violations(violations)
 
     # Build result
     result = {
@@ -139,7 +188,7 @@ def run_compliance_analysis(roof_planes: List[Dict], layouts: List[Dict],
         "compliance_score": score,  # 0-100
         "total_violations": len(violations),
         "violations": [v.to_dict() for v in violations],
-        "summary": generate_summary(status, score, violations, checked_planes),
+        "summary": generate_summary(status, score, severity_counts, checked_planes),
         "checked_planes": checked_planes,
         "total_planes": len(roof_planes)
     }
@@ -147,80 +196,80 @@ def run_compliance_analysis(roof_planes: List[Dict], layouts: List[Dict],
     return result
 
 
-def check_layout_compliance(plane: Dict, layout: Dict, roof_area: float,
-                            ruleset: ComplianceRuleset, plane_name: str) -> List[ComplianceViolation]:
-    """Check a single layout for compliance violations"""
-    violations = []
+def check_layouts_compliance(checks: List[Tuple[str, Dict, float]],
+                             ruleset: ComplianceRuleset) -> List[ComplianceViolation]:
+    """
+    Check layouts for compliance violations.
 
-    # Extract layout parameters
-    panel_count = layout.get("panel_count", 0)
-    offset_from_edge = layout.get("offset_from_edge_m", 0.0)
+    Every rule is a comparison on panel count, edge offset and roof area, so the rules
+    are evaluated as boolean masks over arrays of all layouts; violation objects are
+    only built for the layouts that fail something.
 
-    # RULE 1: Edge Setback Check
-    if offset_from_edge < ruleset.edge_setback_m:
-        violations.append(ComplianceViolation(
-            rule_id="EDGE_SETBACK",
-            rule_name="Edge Setback Requirement",
-            severity="high",
-            message=f"Panels are {offset_from_edge}m from edge (minimum: {ruleset.edge_setback_m}m)",
-            fix_suggestion=f"Increase offset_from_edge to {ruleset.edge_setback_m}m or greater",
-            affected_plane=plane_name
-        ))
+    Args:
+        checks: (plane name, layout dict, roof area in m²) per layout
+        ruleset: Thresholds to check against
 
-    # RULE 2: Roof Coverage Limit
-    panel_total_area = panel_count * ruleset.panel_area_m2
-    coverage_ratio = panel_total_area / roof_area if roof_area > 0 else 0
-
-    if coverage_ratio > ruleset.max_roof_coverage_ratio:
-        violations.append(ComplianceViolation(
-            rule_id="ROOF_COVERAGE",
-            rule_name="Maximum Roof Coverage",
-            severity="high",
-            message=f"Roof coverage is {coverage_ratio*100:.1f}% (maximum: {ruleset.max_roof_coverage_ratio*100:.0f}%)",
-            fix_suggestion=f"Reduce panel count to {int(roof_area * ruleset.max_roof_coverage_ratio / ruleset.panel_area_m2)} or fewer panels",
-            affected_plane=plane_name
-        ))
+    Returns:
+        Violations in layout order, rules in COMPLIANCE_RULES order
+    """
+    if not checks:
+        return []
 
-    # RULE 3: Fire Pathway Check (Heuristic)
-    if coverage_ratio > ruleset.fire_pathway_max_coverage_ratio:
-        violations.append(ComplianceViolation(
-            rule_id="FIRE_PATHWAY_COVERAGE",
-            rule_name="Fire Pathway Clearance",
-            severity="medium",
-            message=f"High roof coverage ({coverage_ratio*100:.1f}%) may restrict fire access pathways",
-            fix_suggestion="Reduce panel coverage or ensure clear pathways for emergency access",
-            affected_plane=plane_name
-        ))
+    panel_count = np.array([layout.get("panel_count", 0) for _, layout, _ in checks], dtype=float)
+    offset = np.array([layout.get("offset_from_edge_m", 0.0) for _, layout, _ in checks], dtype=float)
+    roof_area = np.array([area for _, _, area in checks], dtype=float)
 
-    if offset_from_edge < ruleset.fire_pathway_min_width_m:
-        violations.append(ComplianceViolation(
-            rule_id="FIRE_PATHWAY_WIDTH",
-            rule_name="Fire Pathway Width",
-            severity="medium",
-            message=f"Edge clearance ({offset_from_edge}m) may not provide adequate fire pathway",
-            fix_suggestion=f"Increase edge offset to {ruleset.fire_pathway_min_width_m}m for fire safety",
-            affected_plane=plane_name
-        ))
+    coverage_ratio = np.divide(
+        panel_count * ruleset.panel_area_m2, roof_area,
+        out=np.zeros_like(roof_area), where=roof_area > 0
+    )
+    max_possible_panels = np.floor((roof_area / ruleset.panel_area_m2) * PACKING_FACTOR)
 
+    # RULE 1: Edge Setback Check
+    edge_fail = offset < ruleset.edge_setback_m
+    # RULE 2: Roof Coverage Limit
+    coverage_fail = coverage_ratio > ruleset.max_roof_coverage_ratio
+    # RULE 3: Fire Pathway Check (Heuristic)
+    fire_coverage_fail = coverage_ratio > ruleset.fire_pathway_max_coverage_ratio
+    fire_width_fail = offset < ruleset.fire_pathway_min_width_m
     # RULE 4: Impossible Panel Count (Sanity Check)
-    max_possible_panels = math.floor((roof_area / ruleset.panel_area_m2) * PACKING_FACTOR)
-
-    if panel_count > max_possible_panels:
-        violations.append(ComplianceViolation(
-            rule_id="PANEL_FIT",
-            rule_name="Physical Panel Fit",
-            severity="high",
-            message=f"{panel_count} panels cannot physically fit on {roof_area:.1f}m² roof (max ~{max_possible_panels} panels)",
-            fix_suggestion=f"Reduce panel count to {max_possible_panels} or fewer, or use a larger roof plane",
-            affected_plane=plane_name
-        ))
+    fit_fail = panel_count > max_possible_panels
+
+    # One row per rule, in COMPLIANCE_RULES order
+    rule_failures = np.stack([edge_fail, coverage_fail, fire_coverage_fail, fire_width_fail, fit_fail])
+
+    violations = []
+    for i in np.flatnonzero(rule_failures.any(axis=0)):
+        plane_name, layout, area = checks[i]
+        # Messages show the layout's own values, as entered
+        values = {
+            "panel_count": layout.get("panel_count", 0),
+            "offset_from_edge": layout.get("offset_from_edge_m", 0.0),
+            "coverage_pct": float(coverage_ratio[i]) * 100,
+            "roof_area": area,
+            "max_panels": int(max_possible_panels[i]),
+            "max_panels_for_coverage": int(area * ruleset.max_roof_coverage_ratio / ruleset.panel_area_m2),
+            "edge_setback_m": ruleset.edge_setback_m,
+            "max_coverage_pct": ruleset.max_roof_coverage_ratio * 100,
+            "fire_pathway_min_width_m": ruleset.fire_pathway_min_width_m,
+        }
+        for (rule_id, rule_name, severity, message, fix_suggestion), failed in zip(COMPLIANCE_RULES, rule_failures[:, i]):
+            if failed:
+                violations.append(ComplianceViolation(
+                    rule_id=rule_id,
+                    rule_name=rule_name,
+                    severity=severity,
+                    message=message.format(**values),
+                    fix_suggestion=fix_suggestion.format(**values),
+                    affected_plane=plane_name
+                ))
 
     return violations
 
 
-def calculate_compliance_score(violations: List[ComplianceViolation]) -> int:
+def summarize_violations(violations: List[ComplianceViolation]) -> Tuple[int, str, Counter]:
     """
-    Calculate compliance score from 0-100 based on violations.
+    Score and classify violations with a single count by severity.
 
     Scoring:
     - Start at 100
@@ -228,41 +277,29 @@ def calculate_compliance_score(violations: List[ComplianceViolation]) -> int:
     - Medium severity: -10 points
     - Low severity: -5 points
     - Minimum score: 0
-    """
-    score = 100
-
-    for violation in violations:
-        if violation.severity == "high":
-            score -= 25
-        elif violation.severity == "medium":
-            score -= 10
-        elif violation.severity == "low":
-            score -= 5
-
-    return max(0, score)
-
 
-def determine_compliance_status(violations: List[ComplianceViolation]) -> str:
-    """
-    Determine overall compliance status.
-
-    Logic:
+    Status:
     - Any high severity violation → FAIL
     - Any medium severity violation → WARNING
     - No violations → PASS
+
+    Returns:
+        Tuple of (score, status, Counter of violations by severity)
     """
-    has_high = any(v.severity == "high" for v in violations)
-    has_medium = any(v.severity == "medium" for v in violations)
+    counts = Counter(v.severity for v in violations)
+    score = max(0, 100 - 25 * counts["high"] - 10 * counts["medium"] - 5 * counts["low"])
 
-    if has_high:
-        return "fail"
-    elif has_medium:
-        return "warning"
+    if counts["high"]:
+        status = "fail"
+    elif counts["medium"]:
+        status = "warning"
     else:
-        return "pass"
+        status = "pass"
+
+    return score, status, counts
 
 
-def generate_summary(status: str, score: int, violations: List[ComplianceViolation], checked_planes: int = 0) -> str:
+def generate_summary(status: str, score: int, severity_counts: Counter, checked_planes: int = 0) -> str:
     """Generate human-readable summary of compliance check"""
 
     # No layouts case
@@ -273,11 +310,11 @@ def generate_summary(status: str, score: int, violations: List[ComplianceViolati
         return f"✅ Compliance Check PASSED - Score: {score}/100. Design meets all requirements and is ready for permitting."
 
     elif status == "warning":
-        warning_count = len([v for v in violations if v.severity == "medium"])
+        warning_count = severity_counts["medium"]
         return f"⚠️ Compliance Check WARNING - Score: {score}/100. Design has {warning_count} warning(s) that should be addressed before permitting."
 
     else:  # fail
-        high_count = len([v for v in violations if v.severity == "high"])
+        high_count = severity_counts["high"]
         return f"❌ Compliance Check FAILED - Score: {score}/100. Design has {high_count} critical violation(s) that must be fixed before permitting."
 
 
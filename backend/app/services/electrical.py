@@ -3,20 +3,39 @@ Electrical Analysis Service for Solar Panel Installation
 Determines if electrical panel can safely support planned solar system
 Uses NEC 120% backfeed rule and comprehensive safety checks
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional
+import bisect
+import functools
 import math
 
+# Standard breaker sizes in amps, ascending
+STANDARD_BREAKER_SIZES = (10, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 150, 200)
+
+# Line-to-line factor for three-phase current
+SQRT3 = math.sqrt(3)
+
 
 def round_up_to_standard_breaker(amps: float) -> int:
     """Round up to nearest standard breaker size"""
-    standard_sizes = [10, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 150, 200]
-    for size in standard_sizes:
-        if amps <= size:
-            return size
+    i = bisect.bisect_left(STANDARD_BREAKER_SIZES, amps)
+    if i < len(STANDARD_BREAKER_SIZES):
+        return STANDARD_BREAKER_SIZES[i]
     return 200  # Maximum standard size
 
 
-def calculate_solar_breaker_size(system_size_kw: float, voltage: float, phase_type: str = "single", inverter_efficiency: float = 0.96) -> Dict:
+class SolarBreakerSizing(NamedTuple):
+    """Solar breaker sizing; immutable so cached results can be shared"""
+    system_dc_watts: float
+    inverter_ac_output_watts: float
+    inverter_efficiency_percent: float
+    ac_current_amps: float
+    required_current_with_125_percent_factor_a: float
+    solar_breaker_a: int
+
+
+# Few distinct system sizes, voltages and phase types show up in practice
+@functools.lru_cache(maxsize=256)
+def calculate_solar_breaker_size(system_size_kw: float, voltage: float, phase_type: str = "single", inverter_efficiency: float = 0.96) -> SolarBreakerSizing:
     """
     Calculate required solar breaker size from inverter AC output (CORRECTED NEC COMPLIANT).
 
@@ -30,7 +49,7 @@ def calculate_solar_breaker_size(system_size_kw: float, voltage: float, phase_ty
         inverter_efficiency: Inverter efficiency (typically 0.95-0.97)
 
     Returns:
-        Dictionary with current calculations and breaker size
+        SolarBreakerSizing with current calculations and breaker size (._asdict() for JSON)
     """
     system_dc_watts = system_size_kw * 1000
 
@@ -41,7 +60,7 @@ def calculate_solar_breaker_size(system_size_kw: float, voltage: float, phase_ty
     if phase_type == "three":
         # Three-phase: I = P / (V * √3 * PF)
         # Assuming unity power factor (PF=1.0) for modern inverters
-        ac_current_amps = inverter_ac_output_watts / (voltage * math.sqrt(3))
+        ac_current_amps = inverter_ac_output_watts / (voltage * SQRT3)
     else:
         # Single-phase split-phase (L1-L2): I = P / V
         # For 240V: uses both 120V legs
@@ -54,16 +73,125 @@ def calculate_solar_breaker_size(system_size_kw: float, voltage: float, phase_ty
     # Round up to standard breaker size
     solar_breaker_a = round_up_to_standard_breaker(required_amps)
 
+    return SolarBreakerSizing(
+        system_dc_watts=system_dc_watts,
+        inverter_ac_output_watts=round(inverter_ac_output_watts, 2),
+        inverter_efficiency_percent=round(inverter_efficiency * 100, 1),
+        ac_current_amps=round(ac_current_amps, 2),
+        required_current_with_125_percent_factor_a=round(required_amps, 2),
+        solar_breaker_a=solar_breaker_a
+    )
+
+
+# Survey answer -> (status, severity, message, blocking failure or None).
+# A "fail" status blocks installation and records its reason.
+PANEL_AGE_CHECKS = {
+    "over_30_years": (
+        "fail", "high",
+        "✗ Panel is over 30 years old - replacement strongly recommended before solar installation",
+        "Electrical panel over 30 years old (safety concern)",
+    ),
+    "20_30_years": (
+        "warning", "medium",
+        "⚠ Panel is 20-30 years old - professional inspection by licensed electrician required",
+        None,
+    ),
+    "10_20_years": ("pass", "low", "✓ Panel age is acceptable (10-20 years)", None),
+    "under_10_years": ("pass", "low", "✓ Panel is relatively new (under 10 years)", None),
+}
+PANEL_AGE_UNKNOWN = (
+    "warning", "medium", "⚠ Panel age unknown - professional inspection required before installation", None,
+)
+
+PANEL_CONDITION_CHECKS = {
+    "poor": (
+        "fail", "critical",
+        "✗ BLOCKING FAILURE: Panel in poor condition - repair/replacement required before solar",
+        "Electrical panel in poor physical condition (safety hazard)",
+    ),
+    "fair": ("warning", "medium", "⚠ Panel condition is fair - professional electrician inspection required", None),
+}
+PANEL_CONDITION_OK = ("pass", "low", "✓ Panel physical condition is acceptable", None)  # good or excellent
+
+WIRING_CONDITION_CHECKS = {
+    "poor": (
+        "fail", "critical",
+        "✗ BLOCKING FAILURE: Wiring in poor condition - rewiring required before solar installation",
+        "Wiring in poor condition (cannot safely handle solar backfeed)",
+    ),
+    "fair": (
+        "warning", "medium",
+        "⚠ Wiring condition is fair - professional inspection and possible upgrades required",
+        None,
+    ),
+}
+WIRING_CONDITION_OK = ("pass", "low", "✓ Wiring condition is acceptable for solar installation", None)  # good or excellent
+
+
+# Recommendation per blocking failure: the first rule whose keywords all appear in the
+# (lowercased) failure wins. (keywords, priority, action template, reason, next step)
+BLOCKING_RECOMMENDATIONS = (
+    (
+        ("capacity exceeded",), "critical", "🚫 INSTALLATION BLOCKED: {failure}",
+        "NEC 705.12 violation - fire and safety hazard",
+        "Review automated solutions below and select best option",
+    ),
+    (
+        ("rapid shutdown",), "critical", "🚫 INSTALLATION BLOCKED: {failure}",
+        "Mandatory safety requirement since NEC 2017",
+        "Specify inverter/optimizer with integrated rapid shutdown (most modern inverters include this)",
+    ),
+    (
+        ("arc-fault",), "critical", "🚫 INSTALLATION BLOCKED: {failure}",
+        "Mandatory fire prevention requirement since NEC 2011",
+        "Specify inverter with built-in AFCI protection (standard in modern inverters)",
+    ),
+    (
+        ("panel", "condition"), "critical", "🚫 INSTALLATION BLOCKED: {failure}",
+        "Cannot safely add solar load to deteriorated panel",
+        "Replace electrical panel before proceeding with solar installation",
+    ),
+    (
+        ("wiring",), "critical", "🚫 INSTALLATION BLOCKED: {failure}",
+        "Poor wiring cannot handle solar backfeed current",
+        "Rewire electrical system and obtain inspection approval",
+    ),
+    (
+        ("30 years",), "high", "⚠️ SAFETY CONCERN: {failure}",
+        "Old panels have degraded components and fire risk",
+        "Budget for panel replacement as part of solar project",
+    ),
+)
+
+
+def insufficient_input_result(electrical_data: Dict) -> Dict:
+    """
+    Result for a survey without a system size, panel rating or voltage.
+    Nothing can be sized from it, so every check and the AI assessment are skipped.
+    Returns a new dict each time; callers add keys to the result.
+    """
     return {
-        "system_dc_watts": system_dc_watts,
-        "inverter_ac_output_watts": round(inverter_ac_output_watts, 2),
-        "inverter_efficiency_percent": round(inverter_efficiency * 100, 1),
-        "ac_current_amps": round(ac_current_amps, 2),
-        "required_current_with_125_percent_factor_a": round(required_amps, 2),
-        "solar_breaker_a": solar_breaker_a
+        "analysis_type": "electrical",
+        "status": "insufficient_data",
+        "severity": "low",
+        "summary": "ℹ️ Enter the planned system size, main panel rating and voltage to run the electrical check.",
+        "blocking_failures": [],
+        "automated_solutions": [],
+        "ai_panel_assessment": None,
+        "checks": [],
+        "recommendations": [],
+        "calculations": {},
+        "nec_compliance": {},
+        "raw_data": electrical_data
     }
 
 
+def _survey_number(electrical_data: Dict, key: str, default: float) -> float:
+    """Numeric survey field; a blank form field counts as missing, like an absent key"""
+    value = electrical_data.get(key)
+    return float(default if value is None or value == "" else value)
+
+
 def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[str]] = None) -> Dict:
     """
     Run comprehensive electrical analysis for solar installation.
@@ -87,8 +215,8 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
     # 1. EXTRACT INPUTS
     # =====================
 
-    system_size_kw = float(electrical_data.get("system_size_kw", 0))
-    main_panel_a = float(electrical_data.get("main_panel_rating_a", 0))
+    system_size_kw = _survey_number(electrical_data, "system_size_kw", 0)
+    main_panel_a = _survey_number(electrical_data, "main_panel_rating_a", 0)
     main_breaker_a = float(electrical_data.get("main_breaker_rating_a", 0)) if electrical_data.get("main_breaker_rating_a") else main_panel_a
     phase_type = electrical_data.get("phase_type", "single")
     panel_age = electrical_data.get("panel_age", "unknown")
@@ -97,7 +225,7 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
     # 240V is standard for residential (two 120V legs)
     # 208V for commercial three-phase wye
     # 480V for large commercial three-phase
-    voltage = float(electrical_data.get("voltage", 240))
+    voltage = _survey_number(electrical_data, "voltage", 240)
 
     panel_condition = electrical_data.get("panel_condition", "good")
     wiring_condition = electrical_data.get("wiring_condition", "good")
@@ -105,7 +233,12 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
     # NEC 2023+ Compliance Flags
     has_rapid_shutdown = electrical_data.get("has_rapid_shutdown", False)
     has_arc_fault_protection = electrical_data.get("has_arc_fault_protection", False)
-    inverter_efficiency = float(electrical_data.get("inverter_efficiency", 0.96))
+    inverter_efficiency = _survey_number(electrical_data, "inverter_efficiency", 0.96)
+
+    # Placeholder surveys (missing/zero ratings) can't be sized, and a zero panel
+    # rating or voltage would divide by zero below
+    if system_size_kw <= 0 or main_panel_a <= 0 or voltage <= 0:
+        return insufficient_input_result(electrical_data)
 
     # =====================
     # AI-POWERED PANEL CONDITION ASSESSMENT (if images provided)
@@ -160,13 +293,43 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
             # AI analysis failed, continue with user-provided values
             ai_panel_assessment = {"error": f"AI analysis failed: {str(e)}"}
 
+    inputs = (
+        system_size_kw, voltage, phase_type, main_panel_a, main_breaker_a, panel_age,
+        panel_condition, wiring_condition, has_rapid_shutdown, has_arc_fault_protection, inverter_efficiency,
+    )
+    try:
+        evaluated = _evaluate_electrical(*inputs)
+    except TypeError:
+        # Unhashable survey values (e.g. a list from a malformed form) just skip the cache
+        evaluated = _evaluate_electrical.__wrapped__(*inputs)
+
+    # Shallow copy: callers add keys (uploaded_images, ...) to the result, never to the
+    # cached checks/recommendations inside it
+    result = dict(evaluated)
+    result["ai_panel_assessment"] = ai_panel_assessment
+    result["raw_data"] = electrical_data
+    return result
+
+
+@functools.lru_cache(maxsize=1024, typed=True)  # typed: True and 1 would otherwise share an entry
+def _evaluate_electrical(system_size_kw: float, voltage: float, phase_type: str, main_panel_a: float,
+                         main_breaker_a: float, panel_age: str, panel_condition: str, wiring_condition: str,
+                         has_rapid_shutdown: bool, has_arc_fault_protection: bool, inverter_efficiency: float) -> Dict:
+    """
+    Sizing, checks, solutions and recommendations for one set of survey values.
+
+    Pure in its arguments (the AI assessment has already adjusted them), so results
+    are memoized in-process; the analysis is cheaper than a Redis round-trip.
+    The cached dict is shared: copy it before changing it.
+    """
+
     # =====================
     # 2. CALCULATE SOLAR BREAKER SIZE (CORRECTED)
     # =====================
 
     solar_calc = calculate_solar_breaker_size(system_size_kw, voltage, phase_type, inverter_efficiency)
-    solar_breaker_a = solar_calc["solar_breaker_a"]
-    ac_current_amps = solar_calc["ac_current_amps"]
+    solar_breaker_a = solar_calc.solar_breaker_a
+    ac_current_amps = solar_calc.ac_current_amps
 
     # =====================
     # 3. APPLY 120% BACKFEED RULE (NEC 705.12(D)(2))
@@ -182,11 +345,17 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
     capacity_margin = backfeed_limit_a - required_capacity_a
     capacity_utilization = (required_capacity_a / backfeed_limit_a) * 100
 
+    # Ratings recur across check details, solutions and the summary; format each once
+    main_panel_s = f"{main_panel_a:.0f}A"
+    main_breaker_s = f"{main_breaker_a:.0f}A"
+    solar_breaker_s = f"{solar_breaker_a}A"
+    backfeed_limit_s = f"{backfeed_limit_a:.0f}A"
+    margin_s = f"{capacity_margin:.0f}A"
+
     # =====================
     # 4. RUN COMPREHENSIVE CHECKS (BLOCKING + SCORING)
     # =====================
 
-    checks = []
     blocking_failures = []  # Track critical failures that block installation
 
     # ============================================
@@ -197,32 +366,15 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
 
     if capacity_utilization < 80:
         capacity_severity = "low"
-        capacity_message = f"✓ Panel has excellent capacity margin ({capacity_margin:.0f}A available)"
+        capacity_message = f"✓ Panel has excellent capacity margin ({margin_s} available)"
     elif capacity_utilization < 100:
         capacity_severity = "medium"
-        capacity_message = f"⚠ Panel capacity is tight but acceptable ({capacity_margin:.0f}A margin)"
+        capacity_message = f"⚠ Panel capacity is tight but acceptable ({margin_s} margin)"
     else:
         capacity_severity = "critical"
         capacity_message = f"✗ BLOCKING FAILURE: Panel capacity exceeded by {abs(capacity_margin):.0f}A - INSTALLATION PROHIBITED"
         blocking_failures.append("Panel capacity exceeded (NEC 705.12 violation)")
 
-    checks.append({
-        "name": "Panel Capacity (NEC 705.12 - 120% Rule)",
-        "status": capacity_status,
-        "severity": capacity_severity,
-        "blocking": not capacity_pass,  # This is a blocking check
-        "message": capacity_message,
-        "details": {
-            "main_panel_rating": f"{main_panel_a:.0f}A",
-            "backfeed_limit": f"{backfeed_limit_a:.0f}A (120% of panel)",
-            "main_breaker": f"{main_breaker_a:.0f}A",
-            "solar_breaker": f"{solar_breaker_a}A",
-            "total_required": f"{required_capacity_a}A",
-            "margin": f"{capacity_margin:.0f}A",
-            "utilization": f"{capacity_utilization:.1f}%"
-        }
-    })
-
     # ============================================
     # BLOCKING CHECK 2: Rapid Shutdown (NEC 690.12) - MANDATORY 2023+
     # ============================================
@@ -235,19 +387,6 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
         rapid_shutdown_message = "✗ BLOCKING FAILURE: Rapid shutdown required by NEC 690.12 (2017+) - INSTALLATION PROHIBITED"
         blocking_failures.append("Missing rapid shutdown system (NEC 690.12 violation)")
 
-    checks.append({
-        "name": "Rapid Shutdown (NEC 690.12)",
-        "status": rapid_shutdown_status,
-        "severity": rapid_shutdown_severity,
-        "blocking": not has_rapid_shutdown,
-        "message": rapid_shutdown_message,
-        "details": {
-            "requirement": "Conductors >1ft from array must de-energize to ≤80V within 30 seconds",
-            "typical_solution": "Module-level power electronics (MLPE) or inverter-integrated shutdown",
-            "code_reference": "NEC 2017+ Article 690.12"
-        }
-    })
-
     # ============================================
     # BLOCKING CHECK 3: Arc-Fault Protection (NEC 690.11) - MANDATORY 2023+
     # ============================================
@@ -260,119 +399,30 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
         afci_message = "✗ BLOCKING FAILURE: Arc-fault protection required by NEC 690.11 (2011+) - INSTALLATION PROHIBITED"
         blocking_failures.append("Missing arc-fault protection (NEC 690.11 violation)")
 
-    checks.append({
-        "name": "Arc-Fault Protection (NEC 690.11)",
-        "status": afci_status,
-        "severity": afci_severity,
-        "blocking": not has_arc_fault_protection,
-        "message": afci_message,
-        "details": {
-            "requirement": "PV systems on buildings must detect and interrupt arc faults",
-            "typical_solution": "Inverter with built-in AFCI (most modern inverters include this)",
-            "code_reference": "NEC 2011+ Article 690.11"
-        }
-    })
-
     # ============================================
     # CHECK 4: Panel Age and Condition
     # ============================================
-    age_pass = True
-    age_status = "pass"
-    age_severity = "low"
-
-    if panel_age == "over_30_years":
-        age_pass = False
-        age_status = "fail"
-        age_severity = "high"
-        age_message = "✗ Panel is over 30 years old - replacement strongly recommended before solar installation"
-        blocking_failures.append("Electrical panel over 30 years old (safety concern)")
-    elif panel_age == "20_30_years":
-        age_status = "warning"
-        age_severity = "medium"
-        age_message = "⚠ Panel is 20-30 years old - professional inspection by licensed electrician required"
-    elif panel_age == "10_20_years":
-        age_message = "✓ Panel age is acceptable (10-20 years)"
-    elif panel_age == "under_10_years":
-        age_message = "✓ Panel is relatively new (under 10 years)"
-    else:
-        age_status = "warning"
-        age_severity = "medium"
-        age_message = "⚠ Panel age unknown - professional inspection required before installation"
-
-    checks.append({
-        "name": "Panel Age Assessment",
-        "status": age_status,
-        "severity": age_severity,
-        "blocking": not age_pass,
-        "message": age_message,
-        "details": {
-            "panel_age": panel_age.replace("_", " ").title()
-        }
-    })
+    age_status, age_severity, age_message, age_failure = PANEL_AGE_CHECKS.get(panel_age, PANEL_AGE_UNKNOWN)
+    if age_failure:
+        blocking_failures.append(age_failure)
 
     # ============================================
     # CHECK 5: Panel Physical Condition
     # ============================================
-    condition_pass = True
-    condition_status = "pass"
-    condition_severity = "low"
-
-    if panel_condition == "poor":
-        condition_pass = False
-        condition_status = "fail"
-        condition_severity = "critical"
-        condition_message = "✗ BLOCKING FAILURE: Panel in poor condition - repair/replacement required before solar"
-        blocking_failures.append("Electrical panel in poor physical condition (safety hazard)")
-    elif panel_condition == "fair":
-        condition_status = "warning"
-        condition_severity = "medium"
-        condition_message = "⚠ Panel condition is fair - professional electrician inspection required"
-    else:  # good or excellent
-        condition_message = "✓ Panel physical condition is acceptable"
-
-    checks.append({
-        "name": "Panel Physical Condition",
-        "status": condition_status,
-        "severity": condition_severity,
-        "blocking": not condition_pass,
-        "message": condition_message,
-        "details": {
-            "condition": panel_condition.title(),
-            "inspection_recommended": condition_status == "warning"
-        }
-    })
+    condition_status, condition_severity, condition_message, condition_failure = PANEL_CONDITION_CHECKS.get(
+        panel_condition, PANEL_CONDITION_OK
+    )
+    if condition_failure:
+        blocking_failures.append(condition_failure)
 
     # ============================================
     # CHECK 6: Wiring Condition
     # ============================================
-    wiring_pass = True
-    wiring_status = "pass"
-    wiring_severity = "low"
-
-    if wiring_condition == "poor":
-        wiring_pass = False
-        wiring_status = "fail"
-        wiring_severity = "critical"
-        wiring_message = "✗ BLOCKING FAILURE: Wiring in poor condition - rewiring required before solar installation"
-        blocking_failures.append("Wiring in poor condition (cannot safely handle solar backfeed)")
-    elif wiring_condition == "fair":
-        wiring_status = "warning"
-        wiring_severity = "medium"
-        wiring_message = "⚠ Wiring condition is fair - professional inspection and possible upgrades required"
-    else:  # good or excellent
-        wiring_message = "✓ Wiring condition is acceptable for solar installation"
-
-    checks.append({
-        "name": "Wiring Condition",
-        "status": wiring_status,
-        "severity": wiring_severity,
-        "blocking": not wiring_pass,
-        "message": wiring_message,
-        "details": {
-            "condition": wiring_condition.title(),
-            "inspection_recommended": wiring_status == "warning"
-        }
-    })
+    wiring_status, wiring_severity, wiring_message, wiring_failure = WIRING_CONDITION_CHECKS.get(
+        wiring_condition, WIRING_CONDITION_OK
+    )
+    if wiring_failure:
+        blocking_failures.append(wiring_failure)
 
     # ============================================
     # CHECK 7: System Size vs Panel Rating (proportionality check)
@@ -385,24 +435,99 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
     if size_ratio > 50:
         size_status = "warning"
         size_severity = "medium"
-        size_message = f"⚠ Solar breaker ({solar_breaker_a}A) is {size_ratio:.0f}% of panel rating - panel upgrade strongly recommended"
+        size_message = f"⚠ Solar breaker ({solar_breaker_s}) is {size_ratio:.0f}% of panel rating - panel upgrade strongly recommended"
     elif size_ratio > 30:
-        size_message = f"✓ Solar breaker ({solar_breaker_a}A) is {size_ratio:.0f}% of panel rating - acceptable proportion"
+        size_message = f"✓ Solar breaker ({solar_breaker_s}) is {size_ratio:.0f}% of panel rating - acceptable proportion"
     else:
-        size_message = f"✓ Solar breaker ({solar_breaker_a}A) is {size_ratio:.0f}% of panel rating - well proportioned"
-
-    checks.append({
-        "name": "System Size Proportionality",
-        "status": size_status,
-        "severity": size_severity,
-        "blocking": False,
-        "message": size_message,
-        "details": {
-            "solar_breaker": f"{solar_breaker_a}A",
-            "panel_rating": f"{main_panel_a:.0f}A",
-            "ratio": f"{size_ratio:.1f}%"
+        size_message = f"✓ Solar breaker ({solar_breaker_s}) is {size_ratio:.0f}% of panel rating - well proportioned"
+
+    # All checks in report order, built once their inputs are known
+    checks = [
+        {
+            "name": "Panel Capacity (NEC 705.12 - 120% Rule)",
+            "status": capacity_status,
+            "severity": capacity_severity,
+            "blocking": not capacity_pass,  # This is a blocking check
+            "message": capacity_message,
+            "details": {
+                "main_panel_rating": main_panel_s,
+                "backfeed_limit": f"{backfeed_limit_s} (120% of panel)",
+                "main_breaker": main_breaker_s,
+                "solar_breaker": solar_breaker_s,
+                "total_required": f"{required_capacity_a}A",
+                "margin": margin_s,
+                "utilization": f"{capacity_utilization:.1f}%"
+            }
+        },
+        {
+            "name": "Rapid Shutdown (NEC 690.12)",
+            "status": rapid_shutdown_status,
+            "severity": rapid_shutdown_severity,
+            "blocking": not has_rapid_shutdown,
+            "message": rapid_shutdown_message,
+            "details": {
+                "requirement": "Conductors >1ft from array must de-energize to ≤80V within 30 seconds",
+                "typical_solution": "Module-level power electronics (MLPE) or inverter-integrated shutdown",
+                "code_reference": "NEC 2017+ Article 690.12"
+            }
+        },
+        {
+            "name": "Arc-Fault Protection (NEC 690.11)",
+            "status": afci_status,
+            "severity": afci_severity,
+            "blocking": not has_arc_fault_protection,
+            "message": afci_message,
+            "details": {
+                "requirement": "PV systems on buildings must detect and interrupt arc faults",
+                "typical_solution": "Inverter with built-in AFCI (most modern inverters include this)",
+                "code_reference": "NEC 2011+ Article 690.11"
+            }
+        },
+        {
+            "name": "Panel Age Assessment",
+            "status": age_status,
+            "severity": age_severity,
+            "blocking": age_status == "fail",
+            "message": age_message,
+            "details": {
+                "panel_age": panel_age.replace("_", " ").title()
+            }
+        },
+        {
+            "name": "Panel Physical Condition",
+            "status": condition_status,
+            "severity": condition_severity,
+            "blocking": condition_status == "fail",
+            "message": condition_message,
+            "details": {
+                "condition": panel_condition.title(),
+                "inspection_recommended": condition_status == "warning"
+            }
+        },
+        {
+            "name": "Wiring Condition",
+            "status": wiring_status,
+            "severity": wiring_severity,
+            "blocking": wiring_status == "fail",
+            "message": wiring_message,
+            "details": {
+                "condition": wiring_condition.title(),
+                "inspection_recommended": wiring_status == "warning"
+            }
+        },
+        {
+            "name": "System Size Proportionality",
+            "status": size_status,
+            "severity": size_severity,
+            "blocking": False,
+            "message": size_message,
+            "details": {
+                "solar_breaker": solar_breaker_s,
+                "panel_rating": main_panel_s,
+                "ratio": f"{size_ratio:.1f}%"
+            }
         }
-    })
+    ]
 
     # =====================
     # 5. DETERMINE OVERALL STATUS (BLOCKING CRITERIA APPROACH)
@@ -437,7 +562,7 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
             automated_solutions.append({
                 "solution_type": "main_breaker_derate",
                 "title": f"Option 1: Derate Main Breaker to {int(max_main_breaker_for_current_panel)}A",
-                "description": f"Replace {main_breaker_a:.0f}A main breaker with {int(max_main_breaker_for_current_panel)}A breaker",
+                "description": f"Replace {main_breaker_s} main breaker with {int(max_main_breaker_for_current_panel)}A breaker",
                 "pros": [
                     "Least expensive option (~$200-500)",
                     "No panel replacement needed",
@@ -484,7 +609,7 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
         automated_solutions.append({
             "solution_type": "panel_upgrade",
             "title": f"Option 3: Upgrade to {recommended_panel_size}A Panel",
-            "description": f"Replace {main_panel_a:.0f}A panel with new {recommended_panel_size}A panel",
+            "description": f"Replace {main_panel_s} panel with new {recommended_panel_size}A panel",
             "pros": [
                 "Supports current AND future electrical needs",
                 "Increases home value",
@@ -542,61 +667,24 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
             "priority": "low",
             "action": "✅ APPROVED: Proceed with solar installation",
             "reason": "All NEC requirements met and panel has adequate capacity",
-            "next_step": f"Install {solar_breaker_a}A solar breaker and proceed with interconnection",
+            "next_step": f"Install {solar_breaker_s} solar breaker and proceed with interconnection",
             "installer_notes": "Verify all specs on-site before final installation"
         })
 
     elif overall_status == "blocked":
-        # Generate specific recommendations for each blocking failure
+        # Generate specific recommendations for each blocking failure (first matching rule)
         for failure in blocking_failures:
-            if "capacity exceeded" in failure.lower():
-                recommendations.append({
-                    "priority": "critical",
-                    "action": f"🚫 INSTALLATION BLOCKED: {failure}",
-                    "reason": "NEC 705.12 violation - fire and safety hazard",
-                    "next_step": "Review automated solutions below and select best option",
-                    "blocking": True
-                })
-            elif "rapid shutdown" in failure.lower():
-                recommendations.append({
-                    "priority": "critical",
-                    "action": f"🚫 INSTALLATION BLOCKED: {failure}",
-                    "reason": "Mandatory safety requirement since NEC 2017",
-                    "next_step": "Specify inverter/optimizer with integrated rapid shutdown (most modern inverters include this)",
-                    "blocking": True
-                })
-            elif "arc-fault" in failure.lower():
-                recommendations.append({
-                    "priority": "critical",
-                    "action": f"🚫 INSTALLATION BLOCKED: {failure}",
-                    "reason": "Mandatory fire prevention requirement since NEC 2011",
-                    "next_step": "Specify inverter with built-in AFCI protection (standard in modern inverters)",
-                    "blocking": True
-                })
-            elif "panel" in failure.lower() and "condition" in failure.lower():
-                recommendations.append({
-                    "priority": "critical",
-                    "action": f"🚫 INSTALLATION BLOCKED: {failure}",
-                    "reason": "Cannot safely add solar load to deteriorated panel",
-                    "next_step": "Replace electrical panel before proceeding with solar installation",
-                    "blocking": True
-                })
-            elif "wiring" in failure.lower():
-                recommendations.append({
-                    "priority": "critical",
-                    "action": f"🚫 INSTALLATION BLOCKED: {failure}",
-                    "reason": "Poor wiring cannot handle solar backfeed current",
-                    "next_step": "Rewire electrical system and obtain inspection approval",
-                    "blocking": True
-                })
-            elif "30 years" in failure.lower():
-                recommendations.append({
-                    "priority": "high",
-                    "action": f"⚠️ SAFETY CONCERN: {failure}",
-                    "reason": "Old panels have degraded components and fire risk",
-                    "next_step": "Budget for panel replacement as part of solar project",
-                    "blocking": True
-                })
+            failure_lower = failure.lower()
+            for keywords, priority, action, reason, next_step in BLOCKING_RECOMMENDATIONS:
+                if all(keyword in failure_lower for keyword in keywords):
+                    recommendations.append({
+                        "priority": priority,
+                        "action": action.format(failure=failure),
+                        "reason": reason,
+                        "next_step": next_step,
+                        "blocking": True
+                    })
+                    break
 
     elif overall_status == "warning":
         # Generate warnings for non-blocking issues
@@ -618,22 +706,22 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
     if overall_status == "approved":
         summary = (
             f"✅ APPROVED — All NEC requirements met. "
-            f"System: {system_size_kw}kW ({solar_calc['inverter_ac_output_watts']:.0f}W AC @ {solar_calc['inverter_efficiency_percent']}% efficiency). "
-            f"Breakers: {solar_breaker_a}A solar + {main_breaker_a:.0f}A main = {required_capacity_a:.0f}A total. "
-            f"Panel: {main_panel_a:.0f}A ({backfeed_limit_a:.0f}A @ 120% limit). "
-            f"Margin: {capacity_margin:.0f}A remaining ({100 - capacity_utilization:.1f}% available)."
+            f"System: {system_size_kw}kW ({solar_calc.inverter_ac_output_watts:.0f}W AC @ {solar_calc.inverter_efficiency_percent}% efficiency). "
+            f"Breakers: {solar_breaker_s} solar + {main_breaker_s} main = {required_capacity_a:.0f}A total. "
+            f"Panel: {main_panel_s} ({backfeed_limit_s} @ 120% limit). "
+            f"Margin: {margin_s} remaining ({100 - capacity_utilization:.1f}% available)."
         )
     elif overall_status == "warning":
         summary = (
             f"⚠️ CONDITIONAL APPROVAL — No blocking failures, but warnings exist. "
-            f"System: {system_size_kw}kW. Breakers: {solar_breaker_a}A solar + {main_breaker_a:.0f}A main. "
-            f"Panel: {main_panel_a:.0f}A. Professional inspection recommended before installation."
+            f"System: {system_size_kw}kW. Breakers: {solar_breaker_s} solar + {main_breaker_s} main. "
+            f"Panel: {main_panel_s}. Professional inspection recommended before installation."
         )
     else:  # blocked
         summary = (
             f"🚫 INSTALLATION BLOCKED — {len(blocking_failures)} critical failure(s) prevent installation. "
-            f"System: {system_size_kw}kW requires {solar_breaker_a}A solar breaker. "
-            f"Panel: {main_panel_a:.0f}A (120% limit: {backfeed_limit_a:.0f}A). "
+            f"System: {system_size_kw}kW requires {solar_breaker_s} solar breaker. "
+            f"Panel: {main_panel_s} (120% limit: {backfeed_limit_s}). "
             f"Total required: {required_capacity_a:.0f}A. "
             f"Shortage: {abs(capacity_margin):.0f}A. "
             f"MUST resolve blocking issues before installation."
@@ -646,14 +734,14 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
         "summary": summary,
         "blocking_failures": blocking_failures,  # NEW: List of critical blocking issues
         "automated_solutions": automated_solutions,  # NEW: Calculated fix options
-        "ai_panel_assessment": ai_panel_assessment,  # NEW: AI vision analysis of panel photos
+        "ai_panel_assessment": None,  # Set per call by run_electrical_analysis
         "checks": checks,
         "recommendations": recommendations,
         "calculations": {
             "system_size_kw": system_size_kw,
-            "system_dc_watts": solar_calc["system_dc_watts"],
-            "inverter_ac_output_watts": solar_calc["inverter_ac_output_watts"],
-            "inverter_efficiency_percent": solar_calc["inverter_efficiency_percent"],
+            "system_dc_watts": solar_calc.system_dc_watts,
+            "inverter_ac_output_watts": solar_calc.inverter_ac_output_watts,
+            "inverter_efficiency_percent": solar_calc.inverter_efficiency_percent,
             "voltage": voltage,
             "phase_type": phase_type,
             "ac_current_amps": ac_current_amps,
@@ -671,7 +759,7 @@ def run_electrical_analysis(electrical_data: Dict, image_paths: Optional[List[st
             "backfeed_rule_705_12": capacity_pass,
             "nec_version": "2023"
         },
-        "raw_data": electrical_data
+        "raw_data": None  # Set per call by run_electrical_analysis
     }
 
     return result
@@ -4,11 +4,21 @@ Uses Google's Gemini AI to analyze roof condition from images
 """
 import os
 import base64
+import mmap
 import requests
 from typing import Dict, Optional
 from app.core.config import settings
 
 
+def _encode_image(image_path: str) -> str:
+    """Base64-encode an image straight from a read-only mmap, skipping the read() copy"""
+    with open(image_path, "rb") as image_file:
+        if os.fstat(image_file.fileno()).st_size == 0:
+            return ""  # mmap can't map an empty file
+        with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return base64.b64encode(mapped).decode('ascii')
+
+
 def analyze_roof_with_gemini(image_path: str, image_number: int) -> Dict:
     """
     Analyze a roof image using Gemini Vision API.
@@ -36,8 +46,7 @@ def analyze_roof_with_gemini(image_path: str, image_number: int) -> Dict:
 
     # Read and encode image
     try:
-        with open(image_path, "rb") as image_file:
-            image_data = base64.b64encode(image_file.read()).decode('utf-8')
+        image_data = _encode_image(image_path)
     except Exception as e:
         return {
             "findings": [f"Error reading image: {str(e)}"],
@@ -228,8 +237,7 @@ def analyze_shading_with_gemini(image_path: str, roof_planes: list, obstructions
 
     # Read and encode image
     try:
-        with open(image_path, "rb") as image_file:
-            image_data = base64.b64encode(image_file.read()).decode('utf-8')
+        image_data = _encode_image(image_path)
     except Exception as e:
         return {
             "error": f"Error reading image: {str(e)}",
@@ -393,8 +401,7 @@ def analyze_electrical_panel_with_ai(image_path: str, panel_specs: Optional[Dict
 
     # Read and encode image
     try:
-        with open(image_path, "rb") as image_file:
-            image_data = base64.b64encode(image_file.read()).decode('utf-8')
+        image_data = _encode_image(image_path)
     except Exception as e:
         return {
             "error": f"Error reading image: {str(e)}",
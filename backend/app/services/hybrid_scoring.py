@@ -0,0 +1,34 @@
+"""
+Hybrid Shading Score Blending
+Combines the mathematical and AI shade-risk scores into one hybrid score with a
+confidence label. Works on arrays so historical results can be replayed in bulk.
+"""
+import numpy as np
+
+# Weighted average: 40% math, 60% AI (AI is more accurate for visual analysis)
+MATH_WEIGHT = 0.4
+AI_WEIGHT = 0.6
+
+# Confidence from how closely the two scores agree: <10 very high, <20 high, <30 medium
+CONFIDENCE_BINS = np.array([10, 20, 30])
+CONFIDENCE_LABELS = np.array(["very_high", "high", "medium", "low"])
+
+
+def compute_hybrid_scores(math_scores, ai_scores):
+    """
+    Blend math and AI shade-risk scores element-wise.
+
+    Args:
+        math_scores: Sequence/array of mathematical shade risk scores (0-100)
+        ai_scores: Sequence/array of AI shade risk scores (0-100), same length
+
+    Returns:
+        Tuple of arrays (hybrid_scores, score_diffs, confidence_labels)
+    """
+    math_scores = np.asarray(math_scores, dtype=float)
+    ai_scores = np.asarray(ai_scores, dtype=float)
+
+    hybrid_scores = MATH_WEIGHT * math_scores + AI_WEIGHT * ai_scores
+    score_diffs = np.abs(math_scores - ai_scores)
+    confidence = CONFIDENCE_LABELS[np.digitize(score_diffs, CONFIDENCE_BINS)]
+    return hybrid_scores, score_diffs, confidence
@@ -7,7 +7,11 @@ from shapely import wkt
 from shapely.geometry import Point
 import math
 
+from app.core.config import settings
+from app.services.cache import redis_memoize
 
+
+@redis_memoize("shading")
 def run_shading_analysis(roof_planes, obstructions):
     """
     Analyze shading impact on roof planes from obstructions.
@@ -185,3 +189,62 @@ def analyze_plane_shading(roof_plane, obstructions):
             "obstruction_impacts": [],
             "notes": [f"Error analyzing plane: {str(e)}"]
         }
+
+
+@redis_memoize("shading_ai_vision", exclude=("image_path",), cache_if=lambda result: "error" not in result)
+def _analyze_screenshot(image_sha256, roof_planes, obstructions, latitude, longitude, image_path=None):
+    """Gemini's reading of a screenshot, cached by image hash + geometry so re-runs skip the API"""
+    from app.services.gemini_vision import analyze_shading_with_gemini
+    return analyze_shading_with_gemini(image_path, roof_planes, obstructions, latitude, longitude)
+
+
+def run_ai_vision_shading(image_path, image_sha256, image_url, roof_planes, obstructions, latitude=None, longitude=None):
+    """
+    Shading analysis of a geometry editor screenshot with Gemini Vision.
+    Falls back to run_shading_analysis when Gemini is not configured or fails.
+
+    Args:
+        image_path: Local path of the screenshot
+        image_sha256: SHA-256 hex digest of the screenshot, used as the AI cache key
+        image_url: URL the screenshot is served from, recorded in the result
+        roof_planes: List of dicts with {id, polygon_wkt, name?, tilt_deg?, azimuth_deg?}
+        obstructions: List of dicts with {id, type, polygon_wkt, height_m?}
+        latitude, longitude: Project location, if known
+
+    Returns:
+        Dict with the AI findings, or the heuristic result plus the AI error
+    """
+    if settings.GEMINI_API_KEY:
+        ai_result = _analyze_screenshot(
+            image_sha256,
+            [{"id": p["id"], "name": p.get("name"), "tilt_deg": p.get("tilt_deg"), "azimuth_deg": p.get("azimuth_deg")} for p in roof_planes],
+            [{"id": o["id"], "type": o["type"], "height_m": o.get("height_m")} for o in obstructions],
+            latitude,
+            longitude,
+            image_path=image_path,
+        )
+    else:
+        ai_result = {"error": "Gemini API key not configured", "analysis_method": "no_api_key"}
+
+    if "error" in ai_result:
+        result = run_shading_analysis(roof_planes=roof_planes, obstructions=obstructions)
+        result["ai_analysis_attempted"] = True
+        result["ai_error"] = ai_result.get("error")
+        result["analysis_method"] = "formula_fallback"
+        return result
+
+    return {
+        "summary": f"✨ AI-powered shading analysis using Gemini Vision",
+        "analysis_method": "gemini_vision_ai",
+        "overall_shade_risk": ai_result.get("overall_shade_risk_score", 0),
+        "estimated_annual_loss_percent": ai_result.get("estimated_annual_loss_percent", 0),
+        "confidence": ai_result.get("analysis_confidence", "medium"),
+        "findings": ai_result.get("findings", []),
+        "dominant_obstruction": ai_result.get("dominant_obstruction"),
+        "time_of_day_impact": ai_result.get("time_of_day_impact"),
+        "seasonal_impact": ai_result.get("seasonal_impact"),
+        "recommendations": ai_result.get("recommendations", []),
+        "geometry_image_analyzed": image_url,
+        "total_roof_planes": len(roof_planes),
+        "total_obstructions": len(obstructions)
+    }
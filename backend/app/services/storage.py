@@ -0,0 +1,242 @@
+"""
+Upload Storage Helpers
+Writes uploaded files to disk from async handlers without blocking the event loop.
+Uploads are hard-linked to one copy per content hash, so re-uploading the same image
+reuses the stored data.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import secrets
+import shutil
+
+import aiofiles
+from fastapi import UploadFile
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+# Below this the sendfile setup costs more than the userspace copy it saves
+ZERO_COPY_MIN_SIZE = 256 * 1024
+# Smaller files aren't worth an fsync to get their pages out of the page cache
+DROP_CACHE_MIN_SIZE = 1 << 20  # 1 MiB
+
+# backend/storage/uploads, wherever the API or worker is started from; main.py serves
+# it as /uploads (and /storage/uploads), and storage_urls mirror it
+UPLOADS_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "storage", "uploads"
+)
+# storage_url prefixes of uploaded files; both are served from UPLOADS_ROOT
+UPLOAD_URL_PREFIXES = ("/uploads/", "/storage/uploads/")
+
+# {prefix}_{sha256[:16]}_{token}{ext} as written by save_upload
+_UPLOAD_NAME = re.compile(r"^(?P<shared>.+_[0-9a-f]{16})_[0-9a-f]{8}(?P<ext>\.[^.]*)?$")
+
+# Directories this process has already created; remove_tree forgets the ones it deletes
+_ensured_dirs: set[str] = set()
+# Per-project upload dirs already created, by project id
+_project_dirs: dict[int, str] = {}
+
+
+def ensure_dir(path) -> None:
+    """os.makedirs(path, exist_ok=True), skipping the syscall for directories already ensured"""
+    path = os.fspath(path)
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+
+
+def project_upload_path(project_id: int) -> str:
+    """storage/uploads/project_{id} under UPLOADS_ROOT, without creating it"""
+    return os.path.join(UPLOADS_ROOT, f"project_{project_id}")
+
+
+def project_upload_dir(project_id: int) -> str:
+    """Return storage/uploads/project_{id}, creating it the first time this process asks for it"""
+    path = _project_dirs.get(project_id)
+    if path is None:
+        path = project_upload_path(project_id)
+        os.makedirs(path, exist_ok=True)
+        _project_dirs[project_id] = path
+    return path
+
+
+def remove_file(path) -> None:
+    """Delete a stored file, ignoring one that is already gone; safe to run as a background task"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error deleting {path}: {e}")
+
+
+def upload_path(storage_url: str) -> str | None:
+    """
+    Local path of an uploaded file from its storage_url, under UPLOADS_ROOT like save_upload
+    writes it; None for URLs that don't point at an upload (external links, paths escaping the root)
+    """
+    for prefix in UPLOAD_URL_PREFIXES:
+        if storage_url.startswith(prefix):
+            path = os.path.normpath(os.path.join(UPLOADS_ROOT, storage_url[len(prefix):]))
+            return path if path.startswith(UPLOADS_ROOT + os.sep) else None
+    return None
+
+
+def upload_urls(path: str) -> tuple[str, ...]:
+    """Every storage_url that upload_path maps to path"""
+    relative = os.path.relpath(path, UPLOADS_ROOT).replace(os.sep, "/")
+    return tuple(prefix + relative for prefix in UPLOAD_URL_PREFIXES)
+
+
+def remove_tree(path) -> None:
+    """Delete a directory and everything under it with a single shutil.rmtree"""
+    target = os.path.abspath(path)
+    # Drop it from ensure_dir's cache first, or the next upload would skip recreating it
+    _ensured_dirs.difference_update([d for d in _ensured_dirs if os.path.abspath(d) == target])
+    for project_id in [k for k, d in _project_dirs.items() if os.path.abspath(d) == target]:
+        _project_dirs.pop(project_id, None)
+    shutil.rmtree(target, ignore_errors=True)
+
+
+def _sha256_of(fileobj) -> str:
+    """Hash a seekable file from the start, leaving it rewound"""
+    hasher = hashlib.sha256()
+    fileobj.seek(0)
+    while chunk := fileobj.read(UPLOAD_CHUNK_SIZE):
+        hasher.update(chunk)
+    fileobj.seek(0)
+    return hasher.hexdigest()
+
+
+def _drop_page_cache(fd: int) -> None:
+    """fsync, then tell the kernel the app won't reread these pages so it can evict them"""
+    os.fsync(fd)
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _sendfile_copy(src_fd: int, path: str, size: int, drop_cache: bool = False) -> int:
+    """Copy size bytes from src_fd into a new file at path inside the kernel"""
+    offset = 0
+    with open(path, "wb") as out:
+        while offset < size:
+            sent = os.sendfile(out.fileno(), src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+        if drop_cache and offset >= DROP_CACHE_MIN_SIZE:
+            _drop_page_cache(out.fileno())
+    return offset
+
+
+async def write_upload(upload: UploadFile, path, drop_cache: bool = False) -> tuple[int, str]:
+    """
+    Stream an upload to path in UPLOAD_CHUNK_SIZE chunks, hashing it on the way.
+    With drop_cache, large files are fsynced and evicted from the page cache; use it
+    for files the app won't read back soon.
+    Returns (bytes written, sha256 hex digest).
+    """
+    src = upload.file
+    # Large uploads are spooled to a real temp file, which sendfile can copy without
+    # passing the bytes through Python. sendfile reads by offset, so the hash can read
+    # the same file alongside it.
+    if (
+        hasattr(os, "sendfile")
+        and getattr(src, "_rolled", False)
+        and upload.size is not None
+        and upload.size > ZERO_COPY_MIN_SIZE
+    ):
+        src.flush()
+        size, sha256 = await asyncio.gather(
+            asyncio.to_thread(_sendfile_copy, src.fileno(), path, upload.size, drop_cache),
+            asyncio.to_thread(_sha256_of, src),
+        )
+        return size, sha256
+
+    # hashlib's SHA-256 is OpenSSL's, which uses the CPU's SHA extensions where present
+    hasher = hashlib.sha256()
+    size = 0
+    async with aiofiles.open(path, "wb") as out:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+            await out.write(chunk)
+            size += len(chunk)
+        if drop_cache and size >= DROP_CACHE_MIN_SIZE:
+            await out.flush()
+            await asyncio.to_thread(_drop_page_cache, out.fileno())
+    return size, hasher.hexdigest()
+
+
+def _link_upload(part_path: str, shared_path: str, path: str) -> None:
+    """
+    Give the .part file its final name at path, sharing data with shared_path.
+
+    The first copy of some content is published as shared_path; later ones link
+    path to it and drop their .part. If shared_path vanishes between the check
+    and the link (its last asset was just deleted), the .part becomes path and
+    is published again.
+    """
+    try:
+        os.link(part_path, shared_path)  # Fails if a copy is already stored
+    except FileExistsError:
+        try:
+            os.link(shared_path, path)
+        except FileNotFoundError:
+            os.replace(part_path, path)
+            try:
+                os.link(path, shared_path)
+            except FileExistsError:
+                pass
+        else:
+            os.remove(part_path)
+    else:
+        os.replace(part_path, path)
+
+
+async def save_upload(upload: UploadFile, upload_dir: str, prefix: str, drop_cache: bool = False) -> tuple[str, int, str]:
+    """
+    Store an upload in upload_dir as {prefix}_{sha256[:16]}_{token}{ext}.
+
+    The data is streamed once into a temporary .part file while being hashed.
+    Each upload gets its own name, hard-linked to a shared {prefix}_{sha256[:16]}{ext}
+    copy, so identical uploads take the disk space once and removing one upload's
+    file (see remove_upload) never removes another's data. Concurrent uploads of
+    the same image never expose a partial file. drop_cache is passed to write_upload.
+
+    Returns (filename, size in bytes, sha256 hex digest).
+    """
+    ext = os.path.splitext(upload.filename or "")[1].lower()
+    part_path = os.path.join(upload_dir, f"{prefix}.{os.getpid()}.{id(upload)}.part")
+    try:
+        size, sha256 = await write_upload(upload, part_path, drop_cache)
+        filename = f"{prefix}_{sha256[:16]}_{secrets.token_hex(4)}{ext}"
+        path = os.path.join(upload_dir, filename)
+        shared_path = os.path.join(upload_dir, f"{prefix}_{sha256[:16]}{ext}")
+        await asyncio.to_thread(_link_upload, part_path, shared_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return filename, size, sha256
+
+
+def remove_upload(path) -> None:
+    """
+    Delete one upload saved by save_upload; safe to run as a background task.
+    The shared copy it was linked to goes too once no other upload links to it.
+    Files without a per-upload suffix (stored before uploads got their own names)
+    are removed as they are.
+    """
+    remove_file(path)
+    match = _UPLOAD_NAME.match(os.path.basename(path))
+    if match is None:
+        return
+    shared_path = os.path.join(os.path.dirname(path), match["shared"] + (match["ext"] or ""))
+    try:
+        # A save linking to it concurrently either got its own link first or falls back to its .part
+        if os.stat(shared_path).st_nlink == 1:
+            os.remove(shared_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error deleting {shared_path}: {e}")
@@ -0,0 +1,33 @@
+"""
+Celery Task Dispatch
+Hands queued analyses and reports to the worker from the API process.
+A broker outage leaves records queued instead of failing requests.
+"""
+import time
+
+# After a failed enqueue, skip the broker for this long instead of failing every request
+BROKER_RETRY_SECONDS = 30.0
+_broker_ok = True
+_broker_last_failure = 0.0
+
+
+def enqueue(enqueue_name: str, *args) -> None:
+    """Hand queued work to the Celery worker via app.worker.<enqueue_name>; runs after the response is sent"""
+    global _broker_ok, _broker_last_failure
+    if not _broker_ok and time.monotonic() - _broker_last_failure < BROKER_RETRY_SECONDS:
+        return  # Broker known down; record stays queued
+
+    from app import worker
+    enqueue_fn = getattr(worker, enqueue_name)
+    try:
+        enqueue_fn(*args)
+    except Exception as e:
+        if _broker_ok:
+            print(f"⚠️  Task broker unreachable, leaving records queued: {e}")
+        _broker_ok = False
+        _broker_last_failure = time.monotonic()
+        return
+
+    if not _broker_ok:
+        print("Task broker reachable again")
+        _broker_ok = True
@@ -1,19 +1,25 @@
 from celery import Celery
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import select
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.db.models import AnalysisResult, RoofPlane, Obstruction, Asset, Report, Project, Layout
-from app.services.shading import run_shading_analysis
-from app.services.shading_advanced import run_advanced_shading_analysis
-from app.services.compliance import run_compliance_analysis
-from app.services.roof_risk import run_roof_risk
-from app.services.electrical import run_electrical_analysis
-from app.services.reports import build_minimal_report
 import os
 
+# Service modules (shapely, reportlab, ...) are imported inside the tasks so the
+# API can import the enqueue_* helpers without loading the analysis stack.
 celery_app = Celery("solar_platform", broker=settings.REDIS_URL, backend=settings.REDIS_URL)
 
+# Analyses get their own queue so long AI runs don't hold up report generation.
+# A single worker consumes both with `-Q celery,analysis`; scale them separately as needed.
+ANALYSIS_QUEUE = "analysis"
+celery_app.conf.task_routes = {
+    "app.worker.run_analysis_task": {"queue": ANALYSIS_QUEUE},
+    "app.worker.run_roof_risk_with_data_task": {"queue": ANALYSIS_QUEUE},
+    "app.worker.run_electrical_with_data_task": {"queue": ANALYSIS_QUEUE},
+    "app.worker.run_shading_ai_vision_task": {"queue": ANALYSIS_QUEUE},
+}
+
 def enqueue_analysis(record_id: int, kind: str, project_id: int) -> None:
     celery_app.send_task("app.worker.run_analysis_task", args=[record_id, kind, project_id])
 
@@ -26,6 +32,9 @@ def enqueue_roof_risk_with_data(record_id: int, project_id: int, image_paths: li
 def enqueue_electrical_with_data(record_id: int, project_id: int, image_paths: list, electrical_data: dict) -> None:
     celery_app.send_task("app.worker.run_electrical_with_data_task", args=[record_id, project_id, image_paths, electrical_data])
 
+def enqueue_shading_ai_vision(record_id: int, image_path: str, image_sha256: str, image_url: str, roof_planes: list, obstructions: list, latitude: float | None = None, longitude: float | None = None) -> None:
+    celery_app.send_task("app.worker.run_shading_ai_vision_task", args=[record_id, image_path, image_sha256, image_url, roof_planes, obstructions, latitude, longitude])
+
 @celery_app.task(name="app.worker.run_analysis_task")
 def run_analysis_task(record_id: int, kind: str, project_id: int) -> None:
     db: Session = SessionLocal()
@@ -37,20 +46,21 @@ def run_analysis_task(record_id: int, kind: str, project_id: int) -> None:
         db.commit()
 
         if kind == "shading":
+            from app.services.shading import run_shading_analysis
+            from app.services.shading_advanced import run_advanced_shading_analysis
             planes = db.execute(select(RoofPlane).where(RoofPlane.project_id == project_id)).scalars().all()
             obs = db.execute(select(Obstruction).where(Obstruction.project_id == project_id)).scalars().all()
 
-            # Get project for location data
-            project = db.get(Project, project_id)
-
             # Use advanced analysis if USE_ADVANCED_SHADING env var is set
             use_advanced = os.getenv("USE_ADVANCED_SHADING", "true").lower() == "true"
 
             if use_advanced:
-                # Default to San Francisco if no location specified
-                # In production, this should come from project.latitude, project.longitude
-                latitude = 37.7749  # San Francisco
-                longitude = -122.4194
+                # Default to San Francisco if the project has no location
+                latitude, longitude = db.execute(
+                    select(Project.latitude, Project.longitude).where(Project.id == project_id)
+                ).one()
+                if latitude is None or longitude is None:
+                    latitude, longitude = 37.7749, -122.4194
 
                 rec.result = run_advanced_shading_analysis(
                     roof_planes=[{
@@ -87,6 +97,7 @@ def run_analysis_task(record_id: int, kind: str, project_id: int) -> None:
                     } for o in obs],
                 )
         elif kind == "compliance":
+            from app.services.compliance import run_compliance_analysis
             # Get roof planes and layouts for compliance check
             planes = db.execute(select(RoofPlane).where(RoofPlane.project_id == project_id)).scalars().all()
             layouts = db.execute(select(Layout).where(Layout.project_id == project_id)).scalars().all()
@@ -109,11 +120,13 @@ def run_analysis_task(record_id: int, kind: str, project_id: int) -> None:
                     "polygon_wkt": p.polygon_wkt,
                     "name": p.name,
                     "tilt_deg": p.tilt_deg,
-                    "azimuth_deg": p.azimuth_deg
+                    "azimuth_deg": p.azimuth_deg,
+                    "area_m2": p.area_m2
                 } for p in planes],
                 layouts=layout_dicts
             )
         elif kind == "roof_risk":
+            from app.services.roof_risk import run_roof_risk
             imgs = db.execute(select(Asset).where(Asset.project_id == project_id, Asset.kind == "photo")).scalars().all()
             rec.result = run_roof_risk([a.storage_url for a in imgs])
         elif kind == "electrical":
@@ -129,38 +142,50 @@ def run_analysis_task(record_id: int, kind: str, project_id: int) -> None:
 
 @celery_app.task(name="app.worker.run_report_task")
 def run_report_task(report_id: int, project_id: int) -> None:
+    """Build a report PDF; the API also calls this in-process when no worker is deployed"""
+    from app.services.cache import invalidate_responses
+    from app.services.reports import build_minimal_report
+    from app.services.storage import ensure_dir
     db: Session = SessionLocal()
     try:
         rep = db.get(Report, report_id)
-        proj = db.get(Project, project_id)
+        proj = db.scalar(
+            select(Project)
+            .options(selectinload(Project.assets), selectinload(Project.analysis_results))
+            .where(Project.id == project_id)
+        )
         if not rep or not proj:
             return
-        rep.status = "running"
-        db.commit()
-
-        assets = db.execute(select(Asset).where(Asset.project_id == project_id)).scalars().all()
-        analyses = db.execute(select(AnalysisResult).where(AnalysisResult.project_id == project_id)).scalars().all()
-
-        pdf_bytes = build_minimal_report(
-            project={"id": proj.id, "name": proj.name, "address": proj.address},
-            assets=[{"kind": a.kind, "filename": a.filename, "storage_url": a.storage_url, "content_type": a.content_type} for a in assets],
-            analyses=[{"kind": r.kind, "status": r.status, "result": r.result} for r in analyses],
-        )
+        if rep.status != "running":
+            rep.status = "running"
+            db.commit()
+            invalidate_responses(f"project:{project_id}")
+
+        try:
+            pdf_bytes = build_minimal_report(
+                project={"id": proj.id, "name": proj.name, "address": proj.address},
+                assets=[{"kind": a.kind, "filename": a.filename, "storage_url": a.storage_url, "content_type": a.content_type} for a in proj.assets],
+                analyses=[{"kind": r.kind, "status": r.status, "result": r.result} for r in proj.analysis_results],
+            )
 
-        import os
-        os.makedirs("reports_out", exist_ok=True)
-        out_path = os.path.join("reports_out", f"project_{project_id}_report_{report_id}.pdf")
-        with open(out_path, "wb") as f:
-            f.write(pdf_bytes)
+            ensure_dir("reports_out")
+            out_path = os.path.join("reports_out", f"project_{project_id}_report_{report_id}.pdf")
+            with open(out_path, "wb") as f:
+                f.write(pdf_bytes)
 
-        rep.storage_url = f"file://{out_path}"
-        rep.status = "done"
+            rep.storage_url = f"file://{out_path}"
+            rep.status = "done"
+        except Exception as e:
+            rep.status = "failed"
+            rep.meta = {"error": str(e)}
         db.commit()
+        invalidate_responses(f"project:{project_id}")
     finally:
         db.close()
 
 @celery_app.task(name="app.worker.run_roof_risk_with_data_task")
 def run_roof_risk_with_data_task(record_id: int, project_id: int, image_paths: list, survey_data: dict) -> None:
+    from app.services.roof_risk import run_roof_risk
     db: Session = SessionLocal()
     try:
         rec = db.get(AnalysisResult, record_id)
@@ -185,6 +210,7 @@ def run_roof_risk_with_data_task(record_id: int, project_id: int, image_paths: l
 
 @celery_app.task(name="app.worker.run_electrical_with_data_task")
 def run_electrical_with_data_task(record_id: int, project_id: int, image_paths: list, electrical_data: dict) -> None:
+    from app.services.electrical import run_electrical_analysis
     db: Session = SessionLocal()
     try:
         rec = db.get(AnalysisResult, record_id)
@@ -206,3 +232,24 @@ def run_electrical_with_data_task(record_id: int, project_id: int, image_paths:
         db.commit()
     finally:
         db.close()
+
+@celery_app.task(name="app.worker.run_shading_ai_vision_task")
+def run_shading_ai_vision_task(record_id: int, image_path: str, image_sha256: str, image_url: str, roof_planes: list, obstructions: list, latitude: float | None = None, longitude: float | None = None) -> None:
+    from app.services.shading import run_ai_vision_shading
+    db: Session = SessionLocal()
+    try:
+        rec = db.get(AnalysisResult, record_id)
+        if not rec:
+            return
+        rec.status = "running"
+        db.commit()
+
+        try:
+            rec.result = run_ai_vision_shading(image_path, image_sha256, image_url, roof_planes, obstructions, latitude, longitude)
+            rec.status = "done"
+        except Exception as e:
+            rec.status = "failed"
+            rec.result = {"error": str(e)}
+        db.commit()
+    finally:
+        db.close()
@@ -22,7 +22,8 @@ test_data_1 = {
 
 result_1 = run_electrical_analysis(test_data_1)
 print(f"\nStatus: {result_1['status']}")
-print(f"Score: {result_1['score']}/100")
+print(f"Severity: {result_1['severity']}")
+print(f"Blocking failures: {result_1['blocking_failures']}")
 print(f"Summary: {result_1['summary']}")
 print(f"\nCalculations:")
 for key, value in result_1['calculations'].items():
@@ -57,7 +58,8 @@ test_data_2 = {
 
 result_2 = run_electrical_analysis(test_data_2)
 print(f"\nStatus: {result_2['status']}")
-print(f"Score: {result_2['score']}/100")
+print(f"Severity: {result_2['severity']}")
+print(f"Blocking failures: {result_2['blocking_failures']}")
 print(f"Summary: {result_2['summary']}")
 print(f"\nCalculations:")
 for key, value in result_2['calculations'].items():
@@ -92,7 +94,8 @@ test_data_3 = {
 
 result_3 = run_electrical_analysis(test_data_3)
 print(f"\nStatus: {result_3['status']}")
-print(f"Score: {result_3['score']}/100")
+print(f"Severity: {result_3['severity']}")
+print(f"Blocking failures: {result_3['blocking_failures']}")
 print(f"Summary: {result_3['summary']}")
 print(f"\nCalculations:")
 for key, value in result_3['calculations'].items():
@@ -109,6 +112,22 @@ for rec in result_3['recommendations']:
     print(f"  {rec['reason']}")
     print(f"  {rec['next_step']}\n")
 
+# Test Case 4: Not enough data to size anything
+print("\n" + "=" * 80)
+print("TEST 4: INSUFFICIENT DATA - No system size or panel rating entered")
+print("=" * 80)
+
+test_data_4 = {
+    "system_size_kw": "",
+    "main_panel_rating_a": "",
+    "voltage": "230",
+}
+
+result_4 = run_electrical_analysis(test_data_4)
+print(f"\nStatus: {result_4['status']}")
+print(f"Summary: {result_4['summary']}")
+print(f"Checks run: {len(result_4['checks'])}")
+
 print("\n" + "=" * 80)
 print("All tests completed successfully!")
 print("=" * 80)
@@ -0,0 +1,119 @@
+"""
+API tests run against a throwaway SQLite database in a temp working directory.
+Redis caches are switched off, so tests never depend on a running Redis.
+"""
+import os
+from contextlib import contextmanager
+
+# Settings are read when app modules are imported
+os.environ["RESPONSE_CACHE_TTL"] = "0"
+os.environ["ANALYSIS_CACHE_TTL"] = "0"
+os.environ["ANALYSIS_WORKER_ENABLED"] = "false"
+os.environ["GEMINI_API_KEY"] = ""
+
+import pytest
+import shapely
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.db import models  # noqa: F401  (registers the tables on Base.metadata)
+from app.db.base import Base
+from app.main import app
+from app.services import storage
+
+
+@pytest.fixture(scope="session", autouse=True)
+def working_dir(tmp_path_factory):
+    # Keep uploads and anything else written relative to the working directory out of the repo
+    previous = os.getcwd()
+    workdir = tmp_path_factory.mktemp("workdir")
+    os.chdir(workdir)
+    yield
+    os.chdir(previous)
+
+
+@pytest.fixture(autouse=True)
+def uploads_root(tmp_path, monkeypatch):
+    # Every test's database starts at project id 1, so each also gets its own upload tree
+    root = tmp_path / "storage" / "uploads"
+    monkeypatch.setattr(storage, "UPLOADS_ROOT", str(root))
+    monkeypatch.setattr(storage, "_ensured_dirs", set())
+    monkeypatch.setattr(storage, "_project_dirs", {})
+    return root
+
+
+def _sqlite_connection(dbapi_con, _):
+    dbapi_con.execute("PRAGMA foreign_keys=ON")
+    # Stand-ins for the PostGIS functions behind the generated roof_planes.area_m2 column
+    dbapi_con.create_function("ST_GeomFromText", 1, lambda wkt: wkt, deterministic=True)
+    dbapi_con.create_function("ST_Area", 1, lambda wkt: shapely.from_wkt(wkt).area, deterministic=True)
+
+
+def _postgres_sqlstate(ctx):
+    # fk_violation_as_404 looks for Postgres' SQLSTATE; tag SQLite's FK error the same way
+    if "FOREIGN KEY constraint failed" in str(ctx.original_exception):
+        ctx.original_exception.sqlstate = deps.FOREIGN_KEY_VIOLATION
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Sync engine on a fresh SQLite file with every table created"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", _sqlite_connection)
+    event.listen(engine, "handle_error", _postgres_sqlstate)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def count_queries(engine):
+    """Context manager that collects every statement the sync engine runs inside it"""
+    @contextmanager
+    def counting():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return counting
+
+
+@pytest.fixture
+def client(engine):
+    async_engine = create_async_engine(engine.url.set(drivername="sqlite+aiosqlite"))
+    event.listen(async_engine.sync_engine, "connect", _sqlite_connection)
+    event.listen(async_engine.sync_engine, "handle_error", _postgres_sqlstate)
+
+    session_factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    async_session_factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[deps.get_db] = get_db
+    app.dependency_overrides[deps.get_async_db] = get_async_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def project(client):
+    return client.post("/projects", json={"name": "Test Project"}).json()
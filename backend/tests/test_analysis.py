@@ -0,0 +1,186 @@
+import importlib
+import os
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.db.models import AnalysisResult, Project
+from app.main import app
+from app.services import storage
+from app.services.storage import upload_path
+
+# app.api.routes re-exports each module's router under the module's name
+analysis_routes = importlib.import_module("app.api.routes.analysis")
+from app.services.hybrid_scoring import compute_hybrid_scores
+
+
+def _run_compliance(client, project_id):
+    response = client.post(f"/projects/{project_id}/analysis/compliance/run")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_list_analysis_revalidates_with_etag(client, project):
+    url = f"/projects/{project['id']}/analysis"
+    _run_compliance(client, project["id"])
+    first = client.get(url)
+    etag = first.headers["etag"]
+
+    repeat = client.get(url, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+
+    created = _run_compliance(client, project["id"])
+    after_create = client.get(url, headers={"If-None-Match": etag})
+    assert after_create.status_code == 200
+    assert after_create.headers["etag"] != etag
+
+    client.delete(f"/analysis/{created['id']}")
+    after_delete = client.get(url, headers={"If-None-Match": after_create.headers["etag"]})
+    assert after_delete.status_code == 200
+    assert after_delete.headers["etag"] != after_create.headers["etag"]
+
+
+def test_run_with_screenshot_stores_servable_asset(client, project):
+    response = client.post(
+        f"/projects/{project['id']}/analysis/shading/run_with_screenshot",
+        files={"geometry_screenshot": ("geometry.png", b"png bytes", "image/png")},
+    )
+    assert response.status_code == 200
+
+    (asset,) = client.get(f"/projects/{project['id']}/assets").json()
+    assert asset["storage_url"].startswith(f"/storage/uploads/project_{project['id']}/")
+    with open(upload_path(asset["storage_url"]), "rb") as f:
+        assert f.read() == b"png bytes"
+
+
+@pytest.mark.parametrize("kind, service", [
+    ("shading", "run_shading_analysis"),
+    ("compliance", "run_compliance_analysis"),
+    ("roof_risk", "run_roof_risk"),
+])
+def test_run_analysis_computes_outside_a_transaction(client, project, monkeypatch, kind, service):
+    sessions = []
+    get_async_db = app.dependency_overrides[deps.get_async_db]
+
+    async def recording_get_async_db():
+        async for db in get_async_db():
+            sessions.append(db)
+            yield db
+
+    in_transaction = []
+
+    def compute(*args, **kwargs):
+        in_transaction.append(sessions[0].in_transaction())
+        return {"summary": "stub"}
+
+    monkeypatch.setitem(app.dependency_overrides, deps.get_async_db, recording_get_async_db)
+    monkeypatch.setattr(analysis_routes, service, compute)
+
+    response = client.post(f"/projects/{project['id']}/analysis/{kind}/run")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+    assert in_transaction == [False]
+    stored = client.get(f"/analysis/{response.json()['id']}").json()
+    assert (stored["status"], stored["result"]["summary"]) == ("done", "stub")
+
+
+def _post_screenshot(client, project_id):
+    return client.post(
+        f"/projects/{project_id}/analysis/shading/run_with_screenshot",
+        files={"geometry_screenshot": ("geometry.png", b"png bytes", "image/png")},
+    )
+
+
+def test_run_with_screenshot_project_deleted_mid_upload(client, engine, project, monkeypatch):
+    async def delete_project_then_commit(db):
+        with Session(engine) as other:
+            other.execute(delete(Project).where(Project.id == project["id"]))
+            other.commit()
+        await deps.async_commit_or_404(db)
+
+    monkeypatch.setattr(analysis_routes, "async_commit_or_404", delete_project_then_commit)
+
+    assert _post_screenshot(client, project["id"]).status_code == 404
+    assert not os.path.exists(storage.project_upload_path(project["id"]))
+
+
+def test_run_with_screenshot_failed_save_removes_file(client, project, monkeypatch):
+    async def failing_commit(db):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(analysis_routes, "async_commit_or_404", failing_commit)
+
+    # The run goes ahead without the screenshot
+    assert _post_screenshot(client, project["id"]).status_code == 200
+    assert client.get(f"/projects/{project['id']}/assets").json() == []
+    assert os.listdir(storage.project_upload_path(project["id"])) == []
+
+
+def compute_hybrid_score(math_score, ai_score):
+    """The per-result blend run_analysis used before scoring was vectorized"""
+    hybrid_score = (math_score * 0.4) + (ai_score * 0.6)
+    score_diff = abs(math_score - ai_score)
+    if score_diff < 10:
+        confidence = "very_high"
+    elif score_diff < 20:
+        confidence = "high"
+    elif score_diff < 30:
+        confidence = "medium"
+    else:
+        confidence = "low"
+    return round(hybrid_score, 1), confidence
+
+
+# Pairs on and around every confidence boundary, plus the ends of the 0-100 range
+SCORE_PAIRS = [
+    (0, 0), (100, 0), (0, 100), (50, 59.9), (50, 60), (60, 50), (30, 49.99),
+    (30, 50), (70, 40.01), (70, 40), (12.34, 56.78), (99.5, 0.25),
+]
+
+
+def test_compute_hybrid_scores_matches_scalar_blend():
+    math_scores, ai_scores = zip(*SCORE_PAIRS)
+
+    hybrid_scores, score_diffs, confidences = compute_hybrid_scores(math_scores, ai_scores)
+
+    for (math_score, ai_score), hybrid, diff, confidence in zip(SCORE_PAIRS, hybrid_scores, score_diffs, confidences):
+        assert (round(float(hybrid), 1), str(confidence)) == compute_hybrid_score(math_score, ai_score)
+        assert float(diff) == abs(math_score - ai_score)
+
+
+def test_replay_stored_hybrid_results(client, engine, project):
+    with Session(engine) as db:
+        for math_score, ai_score in SCORE_PAIRS:
+            hybrid, confidence = compute_hybrid_score(math_score, ai_score)
+            db.add(AnalysisResult(project_id=project["id"], kind="shading", status="done", result={
+                "analysis_method": "hybrid_math_ai",
+                "hybrid_shade_risk_score": hybrid,
+                "confidence": confidence,
+                "math_analysis": {"score": math_score},
+                "ai_analysis": {"score": ai_score},
+            }))
+        db.commit()
+    stored = [
+        row["result"] for row in client.get(f"/projects/{project['id']}/analysis", params={"limit": 100}).json()["data"]
+    ]
+
+    response = client.post("/analysis/replay", json={
+        "math_scores": [r["math_analysis"]["score"] for r in stored],
+        "ai_scores": [r["ai_analysis"]["score"] for r in stored],
+    })
+
+    assert response.status_code == 200
+    replayed = response.json()
+    assert replayed["hybrid_scores"] == [r["hybrid_shade_risk_score"] for r in stored]
+    assert replayed["confidence"] == [r["confidence"] for r in stored]
+
+
+def test_replay_rejects_mismatched_lengths(client):
+    response = client.post("/analysis/replay", json={"math_scores": [10, 20], "ai_scores": [10]})
+
+    assert response.status_code == 400
@@ -0,0 +1,172 @@
+import os
+
+from app.api.deps import MAX_BULK_ITEMS
+from app.services import storage
+from app.services.storage import remove_upload, upload_path
+
+
+def _upload(client, project_id, content=b"roof photo bytes"):
+    response = client.post(
+        f"/projects/{project_id}/assets/upload",
+        data={"kind": "photo"},
+        files={"file": ("roof.jpg", content, "image/jpeg")},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _stored_path(asset):
+    return upload_path(asset["storage_url"])
+
+
+def test_delete_asset_removes_uploaded_file(client, project):
+    asset = _upload(client, project["id"])
+    path = _stored_path(asset)
+    assert os.path.exists(path)
+
+    response = client.delete(f"/assets/{asset['id']}")
+
+    assert response.status_code == 200
+    assert not os.path.exists(path)
+
+
+def test_identical_uploads_share_data_but_not_names(client, project):
+    first = _upload(client, project["id"], b"same bytes")
+    second = _upload(client, project["id"], b"same bytes")
+    first_path, second_path = _stored_path(first), _stored_path(second)
+
+    assert first["storage_url"] != second["storage_url"]
+    assert os.path.samefile(first_path, second_path)
+
+    client.delete(f"/assets/{first['id']}")
+    assert not os.path.exists(first_path)
+    with open(second_path, "rb") as f:
+        assert f.read() == b"same bytes"
+
+    client.delete(f"/assets/{second['id']}")
+    # The shared copy goes with the last upload linked to it
+    assert os.listdir(os.path.dirname(second_path)) == []
+
+
+def test_removal_racing_a_new_upload_keeps_the_new_file(client, project):
+    first = _upload(client, project["id"], b"same bytes")
+    second = _upload(client, project["id"], b"same bytes")
+
+    # The background removal for a deleted asset runs after the same bytes were uploaded again
+    remove_upload(_stored_path(first))
+
+    with open(_stored_path(second), "rb") as f:
+        assert f.read() == b"same bytes"
+    assert client.get(f"/projects/{project['id']}/assets").status_code == 200
+
+
+def test_save_falls_back_when_shared_copy_vanishes(tmp_path, monkeypatch):
+    part, shared, path = tmp_path / "a.part", tmp_path / "asset_0123456789abcdef.jpg", tmp_path / "asset_0123456789abcdef_00000000.jpg"
+    part.write_bytes(b"data")
+    real_link = os.link
+    calls = []
+
+    def link(src, dst):
+        calls.append(dst)
+        if len(calls) == 1:
+            raise FileExistsError(dst)  # A copy was stored when we checked...
+        if len(calls) == 2:
+            raise FileNotFoundError(src)  # ...and deleted before we could link to it
+        real_link(src, dst)
+
+    monkeypatch.setattr(storage.os, "link", link)
+    storage._link_upload(str(part), str(shared), str(path))
+
+    assert path.read_bytes() == b"data"
+    assert not part.exists()
+    assert os.path.samefile(path, shared)
+
+
+def test_upload_to_unknown_project_leaves_no_directory(client):
+    response = client.post(
+        "/projects/999/assets/upload",
+        data={"kind": "photo"},
+        files={"file": ("roof.jpg", b"roof photo bytes", "image/jpeg")},
+    )
+
+    assert response.status_code == 404
+    assert not os.path.exists(storage.project_upload_path(999))
+    assert 999 not in storage._project_dirs
+
+
+def test_delete_legacy_shared_name_keeps_file_while_referenced(client, project):
+    project_dir = storage.project_upload_dir(project["id"])
+    with open(os.path.join(project_dir, "asset_0123456789abcdef.jpg"), "wb") as f:
+        f.write(b"legacy")
+    url = f"/uploads/project_{project['id']}/asset_0123456789abcdef.jpg"
+    first, second = client.post(f"/projects/{project['id']}/assets/bulk", json=[
+        {"kind": "photo", "filename": "a.jpg", "storage_url": url},
+        {"kind": "photo", "filename": "b.jpg", "storage_url": url},
+    ]).json()
+
+    client.delete(f"/assets/{first['id']}")
+    assert os.path.exists(upload_path(url))
+
+    client.delete(f"/assets/{second['id']}")
+    assert not os.path.exists(upload_path(url))
+
+
+def test_delete_asset_leaves_external_urls_alone(client, project):
+    asset = client.post(f"/projects/{project['id']}/assets", json={
+        "kind": "photo", "filename": "remote.jpg", "storage_url": "https://example.com/remote.jpg",
+    }).json()
+
+    assert client.delete(f"/assets/{asset['id']}").status_code == 200
+    assert client.delete(f"/assets/{asset['id']}").status_code == 404
+
+
+def test_list_assets_revalidates_with_etag(client, project):
+    url = f"/projects/{project['id']}/assets"
+    _upload(client, project["id"], b"first")
+    first = client.get(url)
+    etag = first.headers["etag"]
+
+    repeat = client.get(url, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    assert repeat.headers["etag"] == etag
+
+    created = _upload(client, project["id"], b"second")
+    after_create = client.get(url, headers={"If-None-Match": etag})
+    assert after_create.status_code == 200
+    assert after_create.headers["etag"] != etag
+
+    client.delete(f"/assets/{created['id']}")
+    after_delete = client.get(url, headers={"If-None-Match": after_create.headers["etag"]})
+    assert after_delete.status_code == 200
+    assert after_delete.headers["etag"] == etag
+
+
+def _asset_payload(name):
+    return {"kind": "document", "filename": name, "storage_url": f"https://example.com/{name}"}
+
+
+def test_bulk_create_assets(client, project):
+    response = client.post(f"/projects/{project['id']}/assets/bulk", json=[
+        _asset_payload("a.pdf"), _asset_payload("b.pdf"),
+    ])
+
+    assert response.status_code == 200
+    assert [a["filename"] for a in response.json()] == ["a.pdf", "b.pdf"]
+    assert len(client.get(f"/projects/{project['id']}/assets").json()) == 2
+
+
+def test_bulk_create_assets_rejects_oversized_batch(client, project):
+    response = client.post(
+        f"/projects/{project['id']}/assets/bulk", json=[_asset_payload("a.pdf")] * (MAX_BULK_ITEMS + 1)
+    )
+
+    assert response.status_code == 422
+    assert client.get(f"/projects/{project['id']}/assets").json() == []
+
+
+def test_bulk_create_assets_unknown_project_is_404(client):
+    response = client.post("/projects/999/assets/bulk", json=[_asset_payload("a.pdf")])
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Project not found"
@@ -0,0 +1,14 @@
+from app.api.deps import etag_matches, list_etag
+
+
+def test_list_etag_is_weak_and_joins_parts():
+    assert list_etag(3, 17, "abc") == 'W/"3-17-abc"'
+
+
+def test_etag_matches_any_listed_tag_or_wildcard():
+    etag = list_etag(3, 17)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'W/"1-2", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(list_etag(4, 18), etag)
@@ -0,0 +1,85 @@
+import pytest
+import orjson
+
+from app.services.electrical import run_electrical_analysis
+
+SURVEY = {
+    "system_size_kw": "9.6",
+    "main_panel_rating_a": "200",
+    "main_breaker_rating_a": "200",
+    "phase_type": "single",
+    "panel_age": "under_10_years",
+    "voltage": "230",
+    "panel_condition": "good",
+    "wiring_condition": "good",
+}
+
+RESULT_KEYS = {
+    "analysis_type", "status", "severity", "summary", "blocking_failures", "automated_solutions",
+    "ai_panel_assessment", "checks", "recommendations", "calculations", "nec_compliance", "raw_data",
+}
+
+
+def test_result_shape():
+    result = run_electrical_analysis(SURVEY)
+
+    assert set(result) == RESULT_KEYS
+    assert result["analysis_type"] == "electrical"
+    assert result["raw_data"] == SURVEY
+    assert {"name", "status", "severity", "blocking", "message"} <= set(result["checks"][0])
+    assert result["calculations"]["solar_breaker_a"] == 63
+    assert result["calculations"]["backfeed_limit_a"] == 240.0
+
+
+def test_missing_nec_protection_blocks_installation():
+    result = run_electrical_analysis(SURVEY)
+
+    assert result["status"] == "blocked"
+    assert "Missing rapid shutdown system (NEC 690.12 violation)" in result["blocking_failures"]
+
+
+def test_compliant_system_is_approved():
+    survey = {**SURVEY, "system_size_kw": "5", "has_rapid_shutdown": True, "has_arc_fault_protection": True}
+
+    result = run_electrical_analysis(survey)
+
+    assert result["status"] == "approved"
+    assert result["blocking_failures"] == []
+
+
+@pytest.mark.parametrize("overrides", [
+    {"system_size_kw": None},
+    {"system_size_kw": ""},
+    {"system_size_kw": "0"},
+    {"main_panel_rating_a": ""},
+    {"main_panel_rating_a": 0},
+    {"voltage": 0},
+])
+def test_unsizeable_survey_returns_insufficient_data(overrides):
+    survey = {**SURVEY, **overrides}
+
+    result = run_electrical_analysis(survey)
+
+    assert set(result) == RESULT_KEYS
+    assert result["status"] == "insufficient_data"
+    assert result["checks"] == []
+    assert result["calculations"] == {}
+    assert result["raw_data"] == survey
+
+
+def test_insufficient_data_results_are_not_shared():
+    first = run_electrical_analysis({})
+    first["checks"].append("mutated")
+
+    assert run_electrical_analysis({})["checks"] == []
+
+
+def test_run_with_data_stores_insufficient_data(client, project):
+    response = client.post(
+        f"/projects/{project['id']}/analysis/electrical/run_with_data",
+        data={"electrical_data": orjson.dumps({"system_size_kw": "", "main_panel_rating_a": ""}).decode()},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+    assert response.json()["result"]["status"] == "insufficient_data"
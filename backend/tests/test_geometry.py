@@ -0,0 +1,71 @@
+import pytest
+
+from app.api.deps import MAX_BULK_ITEMS
+
+SQUARE = "POLYGON((0 0, 10 0, 10 5, 0 5, 0 0))"
+SMALL = "POLYGON((0 0, 4 0, 4 4, 0 4, 0 0))"
+
+
+def test_bulk_create_roof_planes(client, project):
+    response = client.post(f"/projects/{project['id']}/roof-planes/bulk", json=[
+        {"name": "Main", "tilt_deg": 25, "azimuth_deg": 180, "polygon_wkt": SQUARE},
+        {"name": "Garage", "polygon_wkt": SMALL},
+    ])
+
+    assert response.status_code == 200
+    planes = response.json()
+    assert [p["name"] for p in planes] == ["Main", "Garage"]
+    assert all(p["project_id"] == project["id"] and p["id"] for p in planes)
+    # Generated from polygon_wkt by the database on insert
+    assert [p["area_m2"] for p in planes] == [50.0, 16.0]
+    listed = client.get(f"/projects/{project['id']}/roof-planes").json()
+    assert {p["id"] for p in listed} == {p["id"] for p in planes}
+
+
+def test_bulk_create_obstructions(client, project):
+    response = client.post(f"/projects/{project['id']}/obstructions/bulk", json=[
+        {"type": "chimney", "height_m": 1.5, "polygon_wkt": SMALL},
+        {"type": "vent", "polygon_wkt": SMALL},
+    ])
+
+    assert response.status_code == 200
+    assert [o["type"] for o in response.json()] == ["chimney", "vent"]
+
+
+def test_bulk_create_empty_batch(client, project):
+    response = client.post(f"/projects/{project['id']}/roof-planes/bulk", json=[])
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@pytest.mark.parametrize("path, item", [
+    ("roof-planes/bulk", {"polygon_wkt": SMALL}),
+    ("obstructions/bulk", {"type": "vent", "polygon_wkt": SMALL}),
+])
+def test_bulk_create_rejects_oversized_batch(client, project, path, item):
+    response = client.post(f"/projects/{project['id']}/{path}", json=[item] * (MAX_BULK_ITEMS + 1))
+
+    assert response.status_code == 422
+    assert client.get(f"/projects/{project['id']}/{path.split('/')[0]}").json() == []
+
+
+def test_bulk_create_rejects_invalid_polygon_before_inserting(client, project):
+    response = client.post(f"/projects/{project['id']}/roof-planes/bulk", json=[
+        {"polygon_wkt": SQUARE},
+        {"polygon_wkt": "POINT(1 1)"},
+    ])
+
+    assert response.status_code == 400
+    assert client.get(f"/projects/{project['id']}/roof-planes").json() == []
+
+
+@pytest.mark.parametrize("path, item", [
+    ("roof-planes/bulk", {"polygon_wkt": SMALL}),
+    ("obstructions/bulk", {"type": "vent", "polygon_wkt": SMALL}),
+])
+def test_bulk_create_unknown_project_is_404(client, path, item):
+    response = client.post(f"/projects/999/{path}", json=[item])
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Project not found"
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app.db.models import Asset, Layout, Obstruction, Project, Report, RoofPlane
+
+SQUARE = "POLYGON((0 0, 4 0, 4 4, 0 4, 0 0))"
+
+
+@pytest.fixture
+def populated(engine, project):
+    """Two rows behind each list endpoint, so any per-row lazy load would show up"""
+    project_id = project["id"]
+    with Session(engine) as db:
+        db.add(Project(name="Second Project"))
+        for n in range(2):
+            db.add_all([
+                Asset(project_id=project_id, kind="photo", filename=f"roof{n}.jpg", storage_url=f"https://example.com/roof{n}.jpg"),
+                RoofPlane(project_id=project_id, name=f"Plane {n}", polygon_wkt=SQUARE),
+                Obstruction(project_id=project_id, type="vent", polygon_wkt=SQUARE),
+                Layout(project_id=project_id, name=f"Layout {n}"),
+                Report(project_id=project_id),
+            ])
+        db.commit()
+    return project_id
+
+
+@pytest.mark.parametrize("path", [
+    "/projects",
+    "/projects?page=1",
+    "/projects/{id}/assets",
+    "/projects/{id}/reports",
+    "/projects/{id}/layouts",
+    "/projects/{id}/roof-planes",
+    "/projects/{id}/obstructions",
+])
+def test_list_endpoint_runs_at_most_one_query(client, populated, count_queries, path):
+    with count_queries() as statements:
+        response = client.get(path.format(id=populated))
+
+    assert response.status_code == 200
+    body = response.json()
+    # /projects wraps its rows in a page object; the per-project lists are bare arrays
+    assert len(body["data"] if isinstance(body, dict) else body) == 2
+    assert len(statements) <= 1, statements
@@ -0,0 +1,18 @@
+import pytest
+from fastapi import FastAPI
+
+from app.main import app, check_unique_routes
+
+
+def test_registered_routes_are_unique():
+    check_unique_routes(app)
+
+
+def test_duplicate_routes_raise_with_their_keys():
+    duplicated = FastAPI()
+    duplicated.add_api_route("/things", lambda: None, methods=["GET"])
+    duplicated.add_api_route("/things", lambda: None, methods=["GET", "POST"])
+    duplicated.add_api_route("/other", lambda: None, methods=["GET"])
+
+    with pytest.raises(RuntimeError, match=r"\[\('GET', '/things'\)\]"):
+        check_unique_routes(duplicated)
@@ -0,0 +1,86 @@
+import os
+
+from app.services import storage
+
+
+def _create_projects(client, names):
+    return [client.post("/projects", json={"name": name}).json()["id"] for name in names]
+
+
+def test_list_projects_follows_cursor_to_last_page(client):
+    ids = _create_projects(client, [f"Project {i}" for i in range(5)])
+    newest_first = ids[::-1]
+
+    first = client.get("/projects", params={"limit": 2}).json()
+    assert [p["id"] for p in first["data"]] == newest_first[:2]
+    assert first["pagination"]["has_next"] is True
+    assert first["pagination"]["has_prev"] is False
+    assert first["pagination"]["next_cursor"] == newest_first[1]
+    # Keyset mode skips the count
+    assert first["pagination"]["total"] is None
+
+    second = client.get("/projects", params={"limit": 2, "cursor": first["pagination"]["next_cursor"]}).json()
+    assert [p["id"] for p in second["data"]] == newest_first[2:4]
+    assert second["pagination"]["has_prev"] is True
+
+    last = client.get("/projects", params={"limit": 2, "cursor": second["pagination"]["next_cursor"]}).json()
+    assert [p["id"] for p in last["data"]] == newest_first[4:]
+    assert last["pagination"]["has_next"] is False
+    assert last["pagination"]["next_cursor"] is None
+
+
+def test_list_projects_page_mode_returns_totals(client):
+    ids = _create_projects(client, [f"Project {i}" for i in range(5)])
+    newest_first = ids[::-1]
+
+    page = client.get("/projects", params={"page": 2, "limit": 2}).json()
+
+    assert [p["id"] for p in page["data"]] == newest_first[2:4]
+    assert page["pagination"] == {
+        "total": 5, "page": 2, "limit": 2, "total_pages": 3,
+        "has_next": True, "has_prev": True, "next_cursor": None,
+    }
+
+
+def test_list_projects_page_past_the_end_still_counts(client):
+    _create_projects(client, ["Alpha", "Beta", "Gamma"])
+
+    page = client.get("/projects", params={"page": 5, "limit": 2}).json()
+
+    assert page["data"] == []
+    assert page["pagination"]["total"] == 3
+    assert page["pagination"]["total_pages"] == 2
+    assert page["pagination"]["has_next"] is False
+
+
+def test_list_projects_search_applies_to_both_modes(client):
+    _create_projects(client, ["North Roof", "South Roof", "Barn"])
+
+    keyset = client.get("/projects", params={"search": "roof"}).json()
+    numbered = client.get("/projects", params={"search": "roof", "page": 1}).json()
+
+    assert {p["name"] for p in keyset["data"]} == {"North Roof", "South Roof"}
+    assert {p["name"] for p in numbered["data"]} == {"North Roof", "South Roof"}
+    assert numbered["pagination"]["total"] == 2
+
+
+def test_geometry_image_is_served_and_removed_with_the_project(client, project, tmp_path, monkeypatch):
+    # Uploads go to UPLOADS_ROOT, not somewhere relative to the working directory
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+    project_dir = storage.project_upload_path(project["id"])
+
+    uploaded = client.post(
+        f"/projects/{project['id']}/upload-image", files={"file": ("roof.png", b"png bytes", "image/png")}
+    ).json()
+    image = client.get(uploaded["image_url"])
+
+    assert image.status_code == 200
+    assert image.content == b"png bytes"
+    assert os.listdir(project_dir)
+    assert not os.path.exists(cwd / "storage")
+
+    assert client.delete(f"/projects/{project['id']}").status_code == 200
+    assert not os.path.exists(project_dir)
+    assert client.get(uploaded["image_url"]).status_code == 404
@@ -10,6 +10,20 @@ type Project = { id: number; name: string; address?: string | null; status: stri
 type Asset = { id: number; project_id: number; kind: string; filename: string; content_type?: string | null; storage_url: string; meta: any };
 type Report = { id: number; project_id: number; status: string; storage_url?: string | null; meta: any; created_at: string; updated_at: string };
 type AnalysisResult = { id: number; project_id: number; kind: string; status: string; result: any; created_at: string; updated_at: string };
+type AnalysisPage = { data: AnalysisResult[]; next_before_id: number | null };
+
+// The list endpoint is paginated; follow next_before_id so older runs aren't dropped
+async function fetchAllAnalysis(projectId: number): Promise<AnalysisResult[]> {
+  const results: AnalysisResult[] = [];
+  let beforeId: number | null = null;
+  do {
+    const query = beforeId === null ? "" : `&before_id=${beforeId}`;
+    const page: AnalysisPage = await apiGet<AnalysisPage>(`/projects/${projectId}/analysis?limit=100${query}`);
+    results.push(...page.data);
+    beforeId = page.next_before_id;
+  } while (beforeId !== null);
+  return results;
+}
 
 export default function ProjectDetailPage() {
   const params = useParams<{ id: string }>();
@@ -20,7 +34,7 @@ export default function ProjectDetailPage() {
   const assetsQ = useQuery({ queryKey: ["assets", id], queryFn: () => apiGet<Asset[]>(`/projects/${id}/assets`) });
   const analysisQ = useQuery({
     queryKey: ["analysis", id],
-    queryFn: () => apiGet<AnalysisResult[]>(`/projects/${id}/analysis`),
+    queryFn: () => fetchAllAnalysis(id),
     refetchInterval: (query) => {
       // Auto-refresh every 2 seconds if there are any queued/running analyses
       const hasActiveAnalyses = query.state.data?.some(a => a.status === "queued" || a.status === "running");
@@ -844,6 +858,7 @@ export default function ProjectDetailPage() {
       ok: { color: '#10b981', bg: '#10b98110', icon: '✅', label: 'APPROVED' },
       warning: { color: '#f59e0b', bg: '#f59e0b10', icon: '⚠️', label: 'WARNING' },
       fail: { color: '#ef4444', bg: '#ef444410', icon: '❌', label: 'FAILED' },
+      insufficient_data: { color: '#6b7280', bg: '#6b728010', icon: 'ℹ️', label: 'MORE INFO NEEDED' },
       unknown: { color: '#6b7280', bg: '#6b728010', icon: '❓', label: 'UNKNOWN' }
     };
 
@@ -868,6 +883,9 @@ export default function ProjectDetailPage() {
     } else if (status === 'warning') {
       quickSummary = 'Electrical system has concerns that need review';
       actionRequired = 'Review safety checks before proceeding';
+    } else if (status === 'insufficient_data') {
+      quickSummary = 'Not enough survey data to check the electrical system';
+      actionRequired = 'Enter the system size, main panel rating and voltage, then re-run';
     } else {
       quickSummary = 'Unsafe to install solar on current electrical system';
       actionRequired = 'Electrical panel upgrade needed';
@@ -940,16 +958,18 @@ export default function ProjectDetailPage() {
               {config.label}
             </span>
           </div>
-          <div style={{
-            padding: '0.25rem 0.75rem',
-            borderRadius: '0.375rem',
-            background: config.bg,
-            color: config.color,
-            fontWeight: 600,
-            fontSize: '0.9rem'
-          }}>
-            Safety Score: {score}/100
-          </div>
+          {status !== 'insufficient_data' && (
+            <div style={{
+              padding: '0.25rem 0.75rem',
+              borderRadius: '0.375rem',
+              background: config.bg,
+              color: config.color,
+              fontWeight: 600,
+              fontSize: '0.9rem'
+            }}>
+              Safety Score: {score}/100
+            </div>
+          )}
         </div>
 
         {/* Summary */}